@@ -1,2 +1,26 @@
+from typing import TYPE_CHECKING
+
+from wauo._lazy import lazy_module
 from wauo.printer import printer
-from wauo.spiders import *
+
+if TYPE_CHECKING:
+    from wauo.spiders import AsyncWauoSpider, SelectorResponse, WauoSpider
+
+# 爬虫相关的依赖（requests、parsel、lxml、aiohttp）较重，首次访问时才导入
+_exports = {
+    "AsyncWauoSpider": "wauo.spiders.async_spiders",
+    "SelectorResponse": "wauo.spiders.response",
+    "WauoSpider": "wauo.spiders.spiders",
+}
+
+# 以前 from wauo.spiders import * 顺带导出的子模块
+_submodules = {
+    "errors": "wauo.spiders.errors",
+    "response": "wauo.spiders.response",
+    "spiders": "wauo.spiders",
+    "utils": "wauo.utils",
+}
+
+__all__ = ["printer", *_exports]
+
+__getattr__, __dir__ = lazy_module(__name__, _exports, _submodules)
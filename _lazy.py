@@ -0,0 +1,33 @@
+import sys
+from importlib import import_module
+
+
+def lazy_module(name: str, exports: dict[str, str], modules: dict[str, str] = None):
+    """
+    包的延迟导入：返回模块级的 __getattr__ 和 __dir__，名称在首次访问时才导入，之后缓存在包中
+
+    Args:
+        name: 包名（传入 __name__）
+        exports: 名称 => 定义它的模块，访问时返回该模块中的同名对象
+        modules: 名称 => 模块，访问时返回模块本身（子模块的别名、以前顺带导出的标准库模块）
+
+    Examples:
+        __getattr__, __dir__ = lazy_module(__name__, {"WauoSpider": "wauo.spiders.spiders"})
+    """
+    modules = modules or {}
+    namespace = vars(sys.modules[name])
+
+    def __getattr__(attr: str):
+        if attr in exports:
+            value = getattr(import_module(exports[attr]), attr)
+        elif attr in modules:
+            value = import_module(modules[attr])
+        else:
+            raise AttributeError("module {!r} has no attribute {!r}".format(name, attr))
+        namespace[attr] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(exports) | set(modules))
+
+    return __getattr__, __dir__
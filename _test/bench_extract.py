@@ -0,0 +1,77 @@
+"""
+对比三种取值方式的单页耗时（含 HTML 解析）
+- parsel: 直接使用 selector.xpath(...).get()，每次都重新处理查询语句
+- get_one: 逐个字段调用 get_one / get_all
+- extract: 按 schema 一次性提取
+
+python -m wauo._test.bench_extract
+"""
+import time
+
+from requests import Response
+
+from wauo.spiders import SelectorResponse
+
+FIELDS = 30
+PAGES = 500
+
+
+def make_page() -> bytes:
+    rows = "".join(
+        f'<tr><td class="k">key{i}</td><td class="v" id="f{i}"> value {i} </td></tr>' for i in range(FIELDS)
+    )
+    lis = "".join(f'<li><a href="/item/{i}">item {i}</a><span>{i * 3}</span></li>' for i in range(50))
+    html = f"<html><head><title>bench</title></head><body><table>{rows}</table><ul>{lis}</ul></body></html>"
+    return html.encode("utf-8")
+
+
+def make_response(body: bytes) -> SelectorResponse:
+    r = Response()
+    r.status_code = 200
+    r._content = body
+    r.encoding = "utf-8"
+    return SelectorResponse(r)
+
+
+def by_parsel(resp: SelectorResponse) -> dict:
+    item = {f"f{i}": resp.selector.xpath(f'//td[@id="f{i}"]/text()').get().strip() for i in range(FIELDS)}
+    item["items"] = [
+        {"name": li.xpath("./a/text()").get().strip(), "url": li.css("a::attr(href)").get().strip()}
+        for li in resp.xpath("//li")
+    ]
+    return item
+
+
+def by_get_one(resp: SelectorResponse) -> dict:
+    item = {f"f{i}": resp.get_one(f'//td[@id="f{i}"]/text()') for i in range(FIELDS)}
+    names = resp.get_all("//li/a/text()")
+    urls = resp.get_all("//li/a/@href")
+    item["items"] = [{"name": n, "url": u} for n, u in zip(names, urls)]
+    return item
+
+
+SCHEMA = {f"f{i}": f'//td[@id="f{i}"]/text()' for i in range(FIELDS)}
+SCHEMA["items"] = ("//li", {"name": "./a/text()", "url": "css:a::attr(href)"})
+
+
+def by_extract(resp: SelectorResponse) -> dict:
+    return resp.extract(SCHEMA)
+
+
+def bench(name, func, body):
+    t1 = time.perf_counter()
+    for _ in range(PAGES):
+        resp = make_response(body)
+        func(resp)
+    cost = (time.perf_counter() - t1) / PAGES * 1000
+    print(f"{name:<10} {cost:.3f} ms/page")
+    return cost
+
+
+if __name__ == "__main__":
+    body = make_page()
+    assert by_parsel(make_response(body)) == by_get_one(make_response(body)) == by_extract(make_response(body))
+    base = bench("parsel", by_parsel, body)
+    for name, func in [("get_one", by_get_one), ("extract", by_extract)]:
+        cost = bench(name, func, body)
+        print(f"{'':<10} {base / cost:.2f}x vs parsel")
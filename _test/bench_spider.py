@@ -0,0 +1,182 @@
+"""
+爬虫整体基准测试（离线，使用本地 HTTP 服务）
+- 本地服务在子进程中运行，可以设置延迟、响应体大小、HTML/JSON、错误率
+- 对 send / go，在不同并发数、不同线程池（SmartThreadPool、PoolMan）下测量：
+  每秒请求数、p50/p99 延迟、每页 CPU 耗时（只统计爬虫进程）、每个响应的内存占用
+- 结果写入 JSON 文件，便于不同版本之间对比
+
+python -m wauo._test.bench_spider --out bench.json
+python -m wauo._test.bench_spider --latency 0.05 --size 50000 --error-rate 0.01 --concurrency 1 16 64
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from wauo._test.server import serve
+from wauo.pool import SmartThreadPool
+from wauo.spiders import WauoSpider
+from wauo.utils.pools import PoolMan
+
+
+def start_server(port: int) -> multiprocessing.Process:
+    proc = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    proc.start()
+    spider = WauoSpider()
+    for _ in range(100):
+        try:
+            spider.request(f"http://127.0.0.1:{port}/page?size=10", headers={}, timeout=1)
+            return proc
+        except Exception:
+            time.sleep(0.05)
+    raise RuntimeError("本地服务启动失败")
+
+
+def parse(resp, kind: str):
+    """模拟一次典型的解析"""
+    if kind == "json":
+        return len(resp.json()["items"])
+    return len(resp.get_all("//li/a/@href"))
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(method: str, pool_name: str, concurrency: int, url: str, kind: str, total: int) -> dict:
+    spider = WauoSpider(pool_maxsize=concurrency, thread_local=True)
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def job(i):
+        start = time.perf_counter()
+        try:
+            if method == "send":
+                resp = spider.send(url, delay=0)
+            else:
+                resp = spider.go(url, retry_times=0)
+            if resp is None or resp.status_code != 200:
+                raise ValueError("bad response")
+            parse(resp, kind)
+        except Exception as e:
+            with lock:
+                errors.append(type(e).__name__)
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    cpu, t1 = time.process_time(), time.perf_counter()
+    if pool_name == "SmartThreadPool":
+        with SmartThreadPool(max_workers=concurrency) as pool:
+            for i in range(total):
+                pool.submit(job, i)
+    else:
+        with PoolMan(concurrency) as pool:
+            for i in range(total):
+                pool.add(job, i)
+    cost, cpu = time.perf_counter() - t1, time.process_time() - cpu
+    spider.close()
+    return {
+        "method": method,
+        "pool": pool_name,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": len(errors),
+        "rps": round(total / cost, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "cpu_ms_per_page": round(cpu / total * 1000, 3),
+    }
+
+
+def memory_per_response(url: str, kind: str, n=200) -> float:
+    """同时持有 n 个已解析的响应时，平均每个响应占用的内存（KB）"""
+    spider = WauoSpider()
+    spider.send(url, delay=0)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = []
+    for _ in range(n):
+        resp = spider.send(url, delay=0)
+        parse(resp, kind)
+        held.append(resp)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    spider.close()
+    return round(used / n / 1024, 2)
+
+
+def git_commit() -> str | None:
+    try:
+        here = os.path.dirname(os.path.abspath(__file__))
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="wauo 爬虫基准测试")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--requests", type=int, default=2000, help="每组测试的请求数")
+    parser.add_argument("--latency", type=float, default=0.0, help="服务端延迟（秒）")
+    parser.add_argument("--size", type=int, default=20000, help="响应体大小（字节）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="服务端返回 500 的比例")
+    parser.add_argument("--kinds", nargs="+", default=["html", "json"], choices=["html", "json"])
+    parser.add_argument("--methods", nargs="+", default=["send", "go"], choices=["send", "go"])
+    parser.add_argument("--pools", nargs="+", default=["SmartThreadPool", "PoolMan"], choices=["SmartThreadPool", "PoolMan"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--out", default="bench_spider.json", help="结果文件")
+    args = parser.parse_args()
+
+    start_server(args.port)
+    results = []
+    for kind in args.kinds:
+        url = f"http://127.0.0.1:{args.port}/page?kind={kind}&size={args.size}&latency={args.latency}&error={args.error_rate}"
+        memory = memory_per_response(url.replace(f"error={args.error_rate}", "error=0"), kind)
+        print(f"[{kind}] 每个响应约占用 {memory} KB")
+        for method in args.methods:
+            for pool_name in args.pools:
+                for concurrency in args.concurrency:
+                    r = run(method, pool_name, concurrency, url, kind, args.requests)
+                    r.update(kind=kind, kb_per_response=memory)
+                    results.append(r)
+                    print(
+                        f"[{kind}] {method:<4} {pool_name:<15} c={concurrency:<4} {r['rps']:>9.1f} req/s"
+                        f"  p50 {r['p50_ms']:>8.2f} ms  p99 {r['p99_ms']:>8.2f} ms"
+                        f"  cpu {r['cpu_ms_per_page']:>6.2f} ms/page  errors {r['errors']}"
+                    )
+
+    report = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="UTF-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+导入耗时回归检查（python -X importtime）
+- 每条导入语句在新的解释器中执行，统计这条语句的总导入耗时（不含解释器启动）
+- 同时检查不应该被导入的重量级依赖，有违反时以非零状态码退出
+
+python -m wauo._test.check_importtime
+"""
+import subprocess
+import sys
+
+# (导入语句, 不应该被导入的模块)
+CASES = [
+    ("import wauo", ["requests", "parsel", "lxml", "loguru", "aiohttp", "pymysql", "psycopg2", "dbutils"]),
+    ("from wauo import printer", ["requests", "parsel", "lxml", "loguru", "aiohttp", "pymysql", "psycopg2", "dbutils"]),
+    ("from wauo.utils import nget", ["requests", "parsel", "lxml", "aiohttp", "pymysql", "psycopg2", "dbutils"]),
+    ("from wauo import WauoSpider", ["aiohttp", "pymysql", "psycopg2", "dbutils"]),
+    ("from wauo.db import MysqlClient", ["psycopg2", "requests", "parsel", "lxml"]),
+    ("from wauo import AsyncWauoSpider", ["pymysql", "psycopg2", "dbutils"]),
+]
+
+
+def measure(statement: str, forbidden: list[str]) -> tuple[float, list[str]]:
+    """返回 (导入耗时毫秒, 被导入了的禁止模块)"""
+    code = "{}\nimport sys\nprint(','.join(m for m in {!r} if m in sys.modules))".format(statement, forbidden)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    cost, started = 0, False
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package，顶层的导入没有缩进
+        parts = line.split("|")
+        if len(parts) != 3 or parts[2].startswith("  "):
+            continue
+        started = started or parts[2].strip().startswith("wauo")
+        if started:
+            cost += int(parts[1])
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return cost / 1000, loaded
+
+
+def main():
+    failed = False
+    for statement, forbidden in CASES:
+        cost, loaded = measure(statement, forbidden)
+        mark = "OK  " if not loaded else "FAIL"
+        print(f"{mark} {statement:<36} {cost:>8.1f} ms" + (f"  不应导入: {', '.join(loaded)}" if loaded else ""))
+        failed = failed or bool(loaded)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
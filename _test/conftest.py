@@ -0,0 +1,20 @@
+"""
+pytest 共用的夹具（在 wauo 的上级目录中执行 python -m pytest wauo/_test）
+"""
+import pytest
+
+from wauo._test.server import Handler, start
+
+
+@pytest.fixture(scope="session")
+def server():
+    s = start()
+    yield s
+    s.shutdown()
+
+
+@pytest.fixture
+def base(server) -> str:
+    """本地服务的地址，每个测试开始前清空请求记录"""
+    Handler.reset()
+    return "http://127.0.0.1:{}".format(server.server_port)
@@ -0,0 +1,145 @@
+"""
+测试与基准测试共用的本地 HTTP 服务
+- /page?kind=html&size=20000&latency=0.01&error=0.0：基准测试用的 HTML / JSON 页面
+- /file：支持 HEAD 和 Range（包括 bytes=开始-）的文件下载，fail 中的 Range 开头第一次只返回一半数据就断开
+- 其他路径：返回标题和正文都是路径的 HTML，查询参数可以控制
+  status=状态码、latency=延迟秒数、etag=ETag（If-None-Match 相同时返回 304）、header=名称:值（可以重复）
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # 响应头和响应体分两次写出，不关闭 Nagle 会叠加约 40ms 的延迟确认
+    cache = {}
+    data = os.urandom(256 * 1024)  # /file 的内容
+    fail = set()
+    ranges = []  # /file 收到的 Range (开始, 结束)
+    hits = Counter()  # 路径（不含查询参数） => 请求次数
+
+    @classmethod
+    def reset(cls):
+        cls.fail = set()
+        cls.ranges = []
+        cls.hits = Counter()
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status: int, body: bytes, ctype="text/html; charset=utf-8", headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        if urlsplit(self.path).path == "/file":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(self.data)))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+        else:
+            self.do_GET()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        self.hits[parts.path] += 1
+        query = parse_qs(parts.query)
+        if parts.path == "/page":
+            return self.page({k: v[0] for k, v in query.items()})
+        if parts.path == "/file":
+            return self.file()
+        if "latency" in query:
+            time.sleep(float(query["latency"][0]))
+        headers = [tuple(v.split(":", 1)) for v in query.get("header", [])]
+        etag = query.get("etag", [None])[0]
+        if etag:
+            headers.append(("ETag", etag))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        body = "<html><head><title>{0}</title></head><body>{0}</body></html>".format(parts.path).encode()
+        self.reply(int(query.get("status", [200])[0]), body, headers=headers)
+
+    do_POST = do_GET
+
+    def page(self, query: dict):
+        kind = query.get("kind", "html")
+        latency = float(query.get("latency", 0))
+        if latency:
+            time.sleep(latency)
+        if random.random() < float(query.get("error", 0)):
+            return self.reply(500, b"error", "text/plain")
+        ctype = "application/json" if kind == "json" else "text/html; charset=utf-8"
+        self.reply(200, self.body(kind, int(query.get("size", 20000))), ctype)
+
+    def file(self):
+        if "Range" not in self.headers:
+            return self.reply(200, self.data, "application/octet-stream")
+        start, end = self.headers["Range"].removeprefix("bytes=").split("-")
+        start, end = int(start), int(end) if end else len(self.data) - 1
+        if start >= len(self.data):
+            return self.reply(416, b"", "application/octet-stream")
+        self.ranges.append((start, end))
+        body = self.data[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Range", "bytes {}-{}/{}".format(start, end, len(self.data)))
+        self.end_headers()
+        if start in self.fail:
+            self.fail.discard(start)
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    @classmethod
+    def body(cls, kind: str, size: int) -> bytes:
+        key = kind, size
+        if key not in cls.cache:
+            if kind == "json":
+                items, n = [], 0
+                while n < size:
+                    item = {"id": len(items), "name": f"item {len(items)}", "tags": ["a", "b"], "price": 9.9}
+                    n += len(json.dumps(item)) + 2
+                    items.append(item)
+                cls.cache[key] = json.dumps({"items": items}).encode()
+            else:
+                rows, n = [], 0
+                while n < size:
+                    row = f'<li class="item"><a href="/item/{len(rows)}">item {len(rows)}</a><span>9.9</span></li>'
+                    n += len(row)
+                    rows.append(row)
+                cls.cache[key] = f"<html><head><title>bench</title></head><body><ul>{''.join(rows)}</ul></body></html>".encode()
+        return cls.cache[key]
+
+
+def serve(port: int):
+    """在当前线程中运行（基准测试在子进程中调用）"""
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def start() -> ThreadingHTTPServer:
+    """在后台线程中运行，端口随机，用完调用 shutdown"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
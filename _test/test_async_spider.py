@@ -0,0 +1,105 @@
+import asyncio
+import os
+import socket
+import time
+
+import pytest
+
+from wauo import AsyncWauoSpider
+from wauo._test.server import Handler
+from wauo.spiders.dedup import ScalableBloomFilter
+from wauo.spiders.errors import MaxRetryError
+from wauo.spiders.retry import RetryPolicy
+
+
+def run(coro_fn, **kwargs):
+    """创建爬虫，在新的事件循环中执行 coro_fn(spider)，结束后关闭爬虫"""
+    async def main():
+        async with AsyncWauoSpider(**kwargs) as spider:
+            return await coro_fn(spider)
+
+    return asyncio.run(main())
+
+
+def closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_send_and_go(base):
+    async def main(spider):
+        sent = await spider.send(base + "/send", params={"header": "X-Test:1"})
+        got = await spider.go(base + "/go", json={"a": 1})
+        return sent, got
+
+    sent, got = run(main)
+    assert sent.status_code == 200 and sent.get_one("//title/text()") == "/send"
+    assert sent.headers["X-Test"] == "1" and sent.encoding == "utf-8"
+    assert got.request.method == "POST" and got.css("body::text").get() == "/go"
+    assert Handler.hits == {"/send": 1, "/go": 1}
+
+
+def test_go_dedup_and_hooks(base):
+    events = []
+
+    async def main(spider):
+        return [await spider.go(base + "/dedup") for _ in range(2)]
+
+    first, second = run(main, dupefilter=ScalableBloomFilter(capacity=1000), hooks=[events.append])
+    assert first.status_code == 200 and second is None
+    assert Handler.hits["/dedup"] == 1
+    (event,) = [e for e in events if e["type"] == "request"]
+    assert event["host"] == "127.0.0.1" and event["status"] == 200 and event["timings"]["total"] > 0
+
+
+def test_aretry_on_errors():
+    url = "http://127.0.0.1:{}/".format(closed_port())
+    events = []
+
+    async def main(spider):
+        assert await spider.send(url) is None  # send 重试 2 次后返回 None
+        with pytest.raises(MaxRetryError):
+            await spider.go(url, retry_times=1, retry_delay=0)
+
+    run(main, hooks=[events.append])
+    assert len([e for e in events if e["error"] is not None]) == 3 + 2
+
+
+def test_retry_policy(base):
+    async def main(spider):
+        return await spider.go(base + "/flaky?status=503&header=Retry-After:0")
+
+    policy = RetryPolicy(max_retries=2, backoff=0)
+    response = run(main, retry_policy=policy)
+    assert response.status_code == 503  # 重试用完，返回最后一次的响应
+    assert Handler.hits["/flaky"] == 3
+
+
+def test_per_host_limit(base):
+    async def main(spider):
+        begin = time.perf_counter()
+        await asyncio.gather(*[spider.go(base + "/slow/{}?latency=0.2".format(i)) for i in range(6)])
+        return time.perf_counter() - begin
+
+    assert run(main, per_host=2) >= 0.55  # 同时最多 2 个，分 3 轮
+    assert run(main, per_host=6) < 0.45
+
+
+def test_download_and_resume(base, tmp_path):
+    path = str(tmp_path / "file.bin")
+    with open(path, "wb") as f:
+        f.write(Handler.data[:1000])
+
+    async def main(spider):
+        resumed = await spider.download(base + "/file", path, resume=True)
+        again = await spider.download(base + "/file", path, resume=True)  # 已经下载完成，416
+        fresh = await spider.download(base + "/file", str(tmp_path / "fresh.bin"))
+        return resumed, again, fresh
+
+    sizes = run(main)
+    assert sizes == (len(Handler.data),) * 3
+    assert Handler.ranges == [(1000, len(Handler.data) - 1)]
+    for name in ("file.bin", "fresh.bin"):
+        with open(os.path.join(tmp_path, name), "rb") as f:
+            assert f.read() == Handler.data
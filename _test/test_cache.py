@@ -0,0 +1,116 @@
+import os
+import time
+from email.utils import formatdate
+
+import pytest
+
+from wauo import WauoSpider
+from wauo._test.server import Handler
+from wauo.spiders import cache as cache_module
+from wauo.spiders.cache import DiskCache, HttpCache, MemoryCache
+
+
+class LaterClock:
+    """代替 cache 模块中的 time，时间比实际晚 offset 秒"""
+
+    def __init__(self, offset: float):
+        self.offset = offset
+
+    def time(self) -> float:
+        return time.time() + self.offset
+
+
+@pytest.fixture(params=["memory", "disk"])
+def spider(request, tmp_path) -> WauoSpider:
+    store = MemoryCache() if request.param == "memory" else DiskCache(str(tmp_path))
+    events = []
+    spider = WauoSpider(cache=HttpCache(store))
+    spider.add_hook(events.append)
+    spider.events = events
+    return spider
+
+
+def test_revalidate_with_etag(base, spider):
+    url = base + "/etag?etag=v1&header=Cache-Control:max-age=0"
+    first = spider.go(url)
+    assert first.status_code == 200 and not getattr(first, "from_cache", False)
+
+    second = spider.go(url)  # 已经过期，带上 If-None-Match 重新验证，服务器返回 304
+    assert Handler.hits["/etag"] == 2
+    assert second.status_code == 200 and second.from_cache
+    assert second.get_one("//title/text()") == "/etag"
+    assert [e["from_cache"] for e in spider.events if e["type"] == "request"] == [False, True]
+
+
+def test_304_refreshes_lifetime(base, spider, monkeypatch):
+    url = base + "/refresh?etag=v1&header=Cache-Control:max-age=60"
+    spider.go(url)
+    assert spider.go(url).from_cache and Handler.hits["/refresh"] == 1
+
+    monkeypatch.setattr(cache_module, "time", LaterClock(120))  # 过期后重新验证，304 把有效期延长到 120 + 60 秒
+    assert spider.go(url).from_cache and Handler.hits["/refresh"] == 2
+    assert spider.go(url).from_cache and Handler.hits["/refresh"] == 2
+
+
+def test_cache_control_and_expires(base, spider, monkeypatch):
+    def fetch(path: str, header: str = None) -> bool:
+        """请求两次，返回第二次是否命中缓存"""
+        params = {"header": header} if header else None
+        spider.go(base + path, params=params)
+        hits = Handler.hits[path]
+        from_cache = getattr(spider.go(base + path, params=params), "from_cache", False)
+        assert (Handler.hits[path] == hits) == from_cache
+        return from_cache
+
+    assert fetch("/max-age", "Cache-Control:max-age=60")
+    assert fetch("/s-maxage", "Cache-Control:public, s-maxage=60")
+    assert fetch("/expires", "Expires:" + formatdate(time.time() + 60, usegmt=True))
+    assert not fetch("/expired", "Expires:" + formatdate(time.time() - 60, usegmt=True))
+    assert not fetch("/no-store", "Cache-Control:no-store")
+    assert not fetch("/no-cache", "Cache-Control:no-cache")
+    assert not fetch("/plain")
+
+    monkeypatch.setattr(cache_module, "time", LaterClock(120))  # 两分钟后 max-age=60 的缓存已经过期
+    hits = Handler.hits["/max-age"]
+    spider.go(base + "/max-age", params={"header": "Cache-Control:max-age=60"})
+    assert Handler.hits["/max-age"] == hits + 1
+
+
+def test_ttl_overrides_headers(base, spider):
+    spider.cache.ttl = 60
+    spider.go(base + "/ttl")
+    assert spider.go(base + "/ttl").from_cache
+    assert Handler.hits["/ttl"] == 1
+    spider.go(base + "/ttl-no-store", params={"header": "Cache-Control:no-store"})
+    spider.go(base + "/ttl-no-store", params={"header": "Cache-Control:no-store"})
+    assert Handler.hits["/ttl-no-store"] == 2  # no-store 始终不缓存
+
+
+def test_error_status_not_cached(base, spider):
+    for _ in range(2):
+        spider.go(base + "/error", params={"status": 404, "header": "Cache-Control:max-age=60"})
+    assert Handler.hits["/error"] == 2
+
+
+def test_disk_cache_evicts_to_90_percent(tmp_path):
+    entry = {"content": os.urandom(1000)}
+    store = DiskCache(str(tmp_path), max_bytes=10 ** 9)
+    store.set("probe", entry)
+    size = store.total
+    store.delete("probe")
+    assert store.total == 0
+
+    store.max_bytes = size * 10
+    keys = ["{:032x}".format(i) for i in range(10)]
+    for i, key in enumerate(keys):
+        store.set(key, entry)
+        os.utime(store._file(key), (1000 + i, 1000 + i))  # 写入越早越久未使用
+    assert store.total == size * 10
+    store.get(keys[0])  # 读取后变成最近使用的
+
+    store.set("{:032x}".format(99), entry)  # 超过 max_bytes，删除到 90% 以下
+    assert store.total <= store.max_bytes * 0.9
+    assert store.get(keys[0]) is not None
+    assert [store.get(k) for k in keys[1:3]] == [None, None]
+    assert all(store.get(k) is not None for k in keys[3:])
+    assert DiskCache(str(tmp_path)).total == store.total  # 重新打开时统计的大小一致
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from wauo import WauoSpider
+from wauo._test.server import Handler
+
+DATA = Handler.data
+
+
+@pytest.fixture
+def url(base) -> str:
+    return base + "/file"
+
+
+def test_segment_failure_then_resume(url, tmp_path):
+    spider = WauoSpider()
+    path = str(tmp_path / "file.bin")
+    Handler.fail = {64 * 1024}
+
+    with pytest.raises(Exception):
+        spider.download(url, path, chunk_size=4096, segments=4)
+    assert not os.path.exists(path)  # 没有全部成功时不会出现在 save_path
+    assert os.path.exists(path + ".part")
+
+    Handler.ranges = []
+    assert spider.download(url, path, chunk_size=4096, segments=4, resume=True) == len(DATA)
+    assert open(path, "rb").read() == DATA
+    assert Handler.ranges == [(64 * 1024 + 32 * 1024, 128 * 1024 - 1)]  # 只下载失败的那一段缺少的部分
+    assert not os.path.exists(path + ".part") and not os.path.exists(path + ".part.json")
+
+    Handler.ranges = []
+    assert spider.download(url, path, chunk_size=4096, segments=4, resume=True) == len(DATA)
+    assert Handler.ranges == []
+
+
+def test_segments_without_resume_start_over(url, tmp_path):
+    spider = WauoSpider()
+    path = str(tmp_path / "file.bin")
+    Handler.fail = {0}
+    with pytest.raises(Exception):
+        spider.download(url, path, chunk_size=4096, segments=4)
+    Handler.ranges = []
+    spider.download(url, path, chunk_size=4096, segments=4)
+    assert open(path, "rb").read() == DATA
+    assert len(Handler.ranges) == 4
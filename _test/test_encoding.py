@@ -0,0 +1,29 @@
+from requests import Response
+
+from wauo.spiders import SelectorResponse
+from wauo.spiders.encoding import guess_encoding
+
+
+def test_guess_encoding_bounded_prefix():
+    text = "中文内容，English 混排。"
+    for name in ("utf-8", "gb18030"):
+        body = text.encode(name) * 10000
+        for cut in range(4):  # 前缀在多字节字符中间截断时不算错误
+            assert guess_encoding(body, limit=4096 + cut) == name
+    assert guess_encoding("中文".encode() * 10 + b"\xff", limit=16) == "utf-8"  # 只检查前缀
+    assert guess_encoding("中".encode()[:2]) == "gb18030"  # 整个响应体都在前缀内时，末尾截断的字符是错误
+    assert guess_encoding(b"\x81\xff\xfe" * 10) == "cp1252"
+
+
+def test_western_european_page():
+    text = "<html><body><p>naïve façade élève, Grüße aus München</p></body></html>"
+    body = text.encode("cp1252")
+    assert guess_encoding(body) == "cp1252"
+    assert guess_encoding(text.encode("latin-1")) == "cp1252"
+    resp = Response()
+    resp.status_code = 200
+    resp._content = body
+    resp.headers["Content-Type"] = "text/html"
+    resp = SelectorResponse(resp)
+    assert resp.text == text
+    assert resp.get_one("//p/text()") == "naïve façade élève, Grüße aus München"
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+from requests import Response
+
+from wauo.spiders import SelectorResponse
+from wauo.spiders import extract
+
+
+def make_response(body: bytes, content_type="text/html; charset=utf-8") -> SelectorResponse:
+    r = Response()
+    r.status_code = 200
+    r._content = body
+    r.headers["Content-Type"] = content_type
+    return SelectorResponse(r)
+
+
+def test_exslt_set_namespace():
+    resp = make_response(b"<html><body><p class='a'>1</p><p class='a b'>2</p></body></html>")
+    query = "set:difference(//p, //p[contains(@class, 'b')])/text()"
+    assert resp.get_one(query) == resp.selector.xpath(query).get() == "1"
+    assert resp.get_all("//p[re:test(@class, '^a$')]/text()") == ["1"]
+
+
+def test_xml_serialization():
+    resp = make_response(b'<?xml version="1.0"?><root><empty/><a>1</a></root>', "application/xml")
+    assert resp.selector.type == "xml"
+    assert resp.get_one("//empty") == resp.selector.xpath("//empty").get() == "<empty/>"
+    assert resp.extract({"e": "//empty"}) == {"e": "<empty/>"}
+
+
+def test_html_serialization():
+    resp = make_response(b"<html><body><br><p>x</p></body></html>")
+    assert resp.get_one("//p") == resp.selector.xpath("//p").get() == "<p>x</p>"
+
+
+def test_compiled_query_is_per_thread():
+    main = extract.compile_query("//p/text()")
+    assert extract.compile_query("//p/text()") is main
+    other = []
+    t = threading.Thread(target=lambda: other.append(extract.compile_query("//p/text()")))
+    t.start()
+    t.join()
+    assert other[0] is not main
+
+
+def test_slim_body_dropped():
+    resp = make_response(b"<html><body><p>x</p></body></html>")
+    resp.make_slim()
+    assert resp.text.startswith("<html>")  # 解析之前响应体还在
+    assert resp.get_one("//p/text()") == "x"
+    assert resp.body_dropped and resp.content is None
+    for read in (lambda: resp.text, resp.json, lambda: resp.pick("a")):
+        with pytest.raises(ValueError):
+            read()
+    resp.release()
+    with pytest.raises(ValueError):
+        resp.selector
@@ -0,0 +1,37 @@
+import json
+import time
+
+import pytest
+
+from wauo.spiders import fastjson
+
+
+def test_truncated_input_fails_fast():
+    for doc in (b'{"x":[' + b"1," * 100_000, b'{"x":[' + b'"a\\"' * 100_000, b'{"x":[' + b'{"a":"]' * 100_000):
+        start = time.perf_counter()
+        with pytest.raises(ValueError):
+            fastjson.pick(doc, "y")
+        assert time.perf_counter() - start < 1
+
+
+def test_escaped_quotes_and_brackets_in_strings():
+    data = {"a": ['x\\"]', '"}{', "\\", {"b": "[[["}], "c": {"d": '\\\\"]}'}, "y": 1}
+    doc = json.dumps(data)
+    assert fastjson.pick(doc, "y") == 1
+    assert fastjson.pick(doc, "a") == data["a"]
+    assert fastjson.pick(doc, "c.d") == data["c"]["d"]
+    assert fastjson.pick(doc, "a.*") == data["a"]
+
+
+def test_deep_nesting():
+    depth = 5000
+    doc = '{"deep":' + "[" * depth + '"}"' + "]" * depth + ',"y":2}'
+    assert fastjson.pick(doc, "y") == 2
+    with pytest.raises(ValueError):
+        fastjson.pick('{"deep":' + "[" * depth + "]" * (depth - 1) + ',"y":2}', "y")
+
+
+def test_truncated_scalars():
+    for doc in (b'{"a": "x', b'{"a": ', b'{"a":', b"[1,", b'{"b": "y', b'{"b":'):
+        with pytest.raises(ValueError, match="Unterminated JSON value"):
+            fastjson.pick(doc, "a" if doc.startswith(b'{"a"') else "c")
@@ -0,0 +1,97 @@
+import pytest
+
+from wauo.spiders import frontier as frontier_module
+from wauo.spiders.frontier import Frontier
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(frontier_module, "time", clock)
+    return clock
+
+
+def test_doing_requeued_on_reopen(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    f = Frontier(path)
+    assert f.push_many(["http://a.com/{}".format(i) for i in range(3)]) == 3
+    assert not f.push("http://a.com/0")  # 重复的请求不入队
+    fp, _ = f.pop()
+    f.done(fp)
+    f.pop()
+    assert f.stats() == {"todo": 1, "doing": 1, "done": 1, "failed": 0}
+    f.close()
+
+    with Frontier(path) as f:
+        assert f.stats() == {"todo": 2, "doing": 0, "done": 1, "failed": 0}
+        urls = {f.pop()[1], f.pop()[1]}
+        assert urls == {"http://a.com/1", "http://a.com/2"}
+        assert f.pop() is None
+
+
+def test_doing_requeued_after_crash(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    f = Frontier(path, commit_every=1)
+    f.push({"url": "http://a.com/post", "data": {"q": 1}}, priority=3)
+    assert f.pop()[1] == {"url": "http://a.com/post", "data": {"q": 1}}
+    f.conn.close()  # 不调用 close，模拟进程崩溃
+
+    with Frontier(path) as f:
+        assert f.stats()["todo"] == 1
+        assert f.pop()[1]["url"] == "http://a.com/post"
+
+
+def test_host_politeness(tmp_path, clock):
+    with Frontier(str(tmp_path / "frontier.db"), delay=10, delays={"slow.com": 100}) as f:
+        f.push("http://a.com/low")
+        f.push("http://a.com/high", priority=5)
+        f.push("http://a.com/last")
+        f.push("http://b.com/1")
+        f.push("http://slow.com/1")
+        f.push("http://slow.com/2")
+        assert f.next_ready_in() == 0
+
+        first = {f.pop()[1] for _ in range(3)}  # 每个域名出队一个
+        assert first == {"http://a.com/high", "http://b.com/1", "http://slow.com/1"}
+        assert f.pop() is None
+        assert f.next_ready_in() == 10
+
+        clock.now += 9.5
+        assert f.pop() is None and f.next_ready_in() == 0.5
+        clock.now += 0.5
+        assert f.pop()[1] == "http://a.com/low"
+        assert f.pop() is None  # b.com 已经没有请求，slow.com 还要等
+        assert f.next_ready_in() == 10
+
+        clock.now += 10
+        assert f.pop()[1] == "http://a.com/last"
+        assert f.pop() is None
+        assert f.next_ready_in() == 10  # a.com 的间隔还在计算中，即使已经没有请求
+
+        clock.now += 80
+        assert f.pop()[1] == "http://slow.com/2"
+        clock.now += 100
+        assert f.pop() is None
+        assert f.next_ready_in() is None
+
+
+def test_failed_stops_at_max_retries(tmp_path):
+    with Frontier(str(tmp_path / "frontier.db"), max_retries=2) as f:
+        f.push("http://a.com/1")
+        attempts = 0
+        while (item := f.pop()) is not None:
+            attempts += 1
+            f.failed(item[0])
+        assert attempts == 3  # 第一次 + 重试 2 次
+        assert f.stats() == {"todo": 0, "doing": 0, "done": 0, "failed": 1}
+        assert f.next_ready_in() is None
+        f.failed("unknown")  # 不存在的指纹被忽略
+        assert not f.push("http://a.com/1")  # 失败的请求也不会重复入队
@@ -0,0 +1,19 @@
+import wauo
+import wauo.utils
+
+
+def test_lazy_exports_and_compat_names():
+    assert wauo.errors.ResponseCodeError.__module__ == "wauo.spiders.errors"
+    assert wauo.response.SelectorResponse is wauo.SelectorResponse
+    assert wauo.utils.time.time() > 0 and wauo.utils.datetime.now() and wauo.utils.funcs.nget is wauo.utils.nget
+    assert "WauoSpider" in dir(wauo) and "errors" in dir(wauo)
+    assert "datetime" not in wauo.utils.__all__  # 兼容的名称不在 __all__ 中
+
+
+def test_unknown_name():
+    try:
+        wauo.utils.nope
+    except AttributeError as e:
+        assert "nope" in str(e)
+    else:
+        raise AssertionError
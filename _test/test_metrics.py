@@ -0,0 +1,90 @@
+import math
+import socket
+
+from wauo import WauoSpider
+from wauo.spiders.cache import HttpCache
+from wauo.spiders.metrics import Metrics
+
+
+def test_prometheus_text():
+    metrics = Metrics(buckets=(0.5, 1, math.inf))
+    metrics({"type": "request", "host": "a.com", "status": 200, "error": None, "timings": {"total": 0.25, "ttfb": 0.25}})
+    metrics({"type": "request", "host": "a.com", "status": 200, "error": None, "timings": {"total": 2.0, "ttfb": 0.5}})
+    metrics({"type": "request", "host": "a.com", "status": 200, "error": None, "timings": {}, "from_cache": True})
+    metrics({"type": "request", "host": "b.com", "status": 404, "error": None, "timings": {"total": 0.75}})
+    metrics({"type": "request", "host": "b.com", "status": None, "error": TimeoutError(), "timings": {"total": 5.0}})
+    metrics({"type": "parse", "host": "a.com", "timings": {"parse": 0.5}})
+
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE wauo_requests_total counter",
+        'wauo_requests_total{host="a.com",status="200"} 3',
+        'wauo_requests_total{host="b.com",status="404"} 1',
+        "# TYPE wauo_errors_total counter",
+        'wauo_errors_total{host="b.com",error="TimeoutError"} 1',
+        "# TYPE wauo_cache_hits_total counter",
+        'wauo_cache_hits_total{host="a.com"} 1',
+        "# TYPE wauo_parse_seconds histogram",
+        'wauo_parse_seconds_bucket{host="a.com",le="0.5"} 1',
+        'wauo_parse_seconds_bucket{host="a.com",le="1"} 1',
+        'wauo_parse_seconds_bucket{host="a.com",le="+Inf"} 1',
+        'wauo_parse_seconds_sum{host="a.com"} 0.5',
+        'wauo_parse_seconds_count{host="a.com"} 1',
+        "# TYPE wauo_total_seconds histogram",
+        'wauo_total_seconds_bucket{host="a.com",le="0.5"} 1',
+        'wauo_total_seconds_bucket{host="a.com",le="1"} 1',
+        'wauo_total_seconds_bucket{host="a.com",le="+Inf"} 2',
+        'wauo_total_seconds_sum{host="a.com"} 2.25',
+        'wauo_total_seconds_count{host="a.com"} 2',
+        'wauo_total_seconds_bucket{host="b.com",le="0.5"} 0',
+        'wauo_total_seconds_bucket{host="b.com",le="1"} 1',
+        'wauo_total_seconds_bucket{host="b.com",le="+Inf"} 1',
+        'wauo_total_seconds_sum{host="b.com"} 0.75',
+        'wauo_total_seconds_count{host="b.com"} 1',
+        "# TYPE wauo_ttfb_seconds histogram",
+        'wauo_ttfb_seconds_bucket{host="a.com",le="0.5"} 2',
+        'wauo_ttfb_seconds_bucket{host="a.com",le="1"} 2',
+        'wauo_ttfb_seconds_bucket{host="a.com",le="+Inf"} 2',
+        'wauo_ttfb_seconds_sum{host="a.com"} 0.75',
+        'wauo_ttfb_seconds_count{host="a.com"} 2',
+    ]
+    assert metrics.to_prometheus(prefix="spider").startswith("# TYPE spider_requests_total counter\n")
+
+
+def test_hook_event_flow(base, tmp_path):
+    metrics = Metrics()
+    events = []
+    spider = WauoSpider(hooks=[metrics, events.append], cache=HttpCache(ttl=60))
+    spider.is_raise_error = False
+
+    page = spider.go(base + "/page.html")
+    assert page.get_one("//title/text()") == "/page.html"  # 第一次解析时发出 parse 事件
+    page.get_one("//body/text()")
+    assert spider.go(base + "/page.html").from_cache
+    spider.go(base + "/missing", params={"status": 404})
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed = "http://127.0.0.1:{}/".format(s.getsockname()[1])
+    assert spider.go(closed, retry_times=1, retry_delay=0) is None
+
+    assert [(e["type"], e.get("status"), e.get("from_cache")) for e in events] == [
+        ("request", 200, False),
+        ("parse", None, None),
+        ("request", 200, True),
+        ("request", 404, False),
+        ("request", None, False),
+        ("request", None, False),
+    ]
+    assert set(events[0]["timings"]) == {"wait", "ttfb", "download", "total"}
+    assert dict(metrics.requests) == {("127.0.0.1", 200): 2, ("127.0.0.1", 404): 1}
+    assert dict(metrics.errors) == {("127.0.0.1", "ConnectionError"): 2}
+    assert dict(metrics.cache_hits) == {"127.0.0.1": 1}
+    assert metrics.histograms["total", "127.0.0.1"].count == 2  # 缓存命中没有耗时
+    assert metrics.histograms["parse", "127.0.0.1"].count == 1
+
+    path = str(tmp_path / "wauo.prom")
+    metrics.write_prometheus(path)
+    with open(path, encoding="UTF-8") as f:
+        text = f.read()
+    assert 'wauo_requests_total{host="127.0.0.1",status="404"} 1' in text
+    assert 'wauo_errors_total{host="127.0.0.1",error="ConnectionError"} 2' in text
+    assert "127.0.0.1 | 请求 3 失败 2 缓存 1" in metrics.summary()
@@ -0,0 +1,43 @@
+import threading
+import time
+
+from wauo.db.pipeline import ItemPipeline
+
+
+class SlowClient:
+    def __init__(self):
+        self.release = threading.Event()
+        self.rows = []
+
+    def insert_many(self, table: str, items: list[dict]):
+        self.release.wait(5)
+        self.rows.extend(items)
+
+
+def test_put_blocked_then_closed():
+    client = SlowClient()
+    pipeline = ItemPipeline(client, "t", batch_size=2, max_pending=2)
+    pipeline.put({"a": 1})
+    pipeline.put({"a": 2})  # 凑够一批，后台线程写入时阻塞，pending 保持为 2
+
+    errors = []
+
+    def put():
+        try:
+            errors.append(pipeline.put({"a": 3}))
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=put)
+    t.start()
+    time.sleep(0.2)
+    assert t.is_alive()  # 等待 pending 减少
+
+    closer = threading.Thread(target=pipeline.close)
+    closer.start()
+    t.join(2)
+    assert not t.is_alive() and isinstance(errors[0], RuntimeError)
+
+    client.release.set()
+    closer.join(5)
+    assert client.rows == [{"a": 1}, {"a": 2}]
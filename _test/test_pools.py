@@ -0,0 +1,230 @@
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from wauo.pool import SmartProcessPool, SmartThreadPool
+from wauo.pool import process_pool
+from wauo.pool.adaptive import AdaptiveLimit
+from wauo.spiders.metrics import Histogram as MetricsHistogram
+from wauo.utils import Histogram, PoolMan
+
+
+def test_stats_counters():
+    gate = threading.Event()
+    pool = PoolMan(speed=2, limit=5)
+    for _ in range(5):
+        pool.add(gate.wait, 5)
+    deadline = time.time() + 5
+    while pool.stats()["running"] < 2 and time.time() < deadline:  # 等待两个线程开始执行
+        time.sleep(0.01)
+    s = pool.stats()
+    assert (s["queued"], s["running"], s["completed"]) == (3, 2, 0)
+    gate.set()
+    pool.block()
+    s = pool.stats()
+    assert (s["queued"], s["running"], s["completed"], s["failed"]) == (0, 0, 5, 0)
+    pool.close()
+
+
+def test_histogram_shared():
+    assert Histogram is MetricsHistogram
+    h = Histogram((1, 2, float("inf")))
+    for v in (0.5, 1.5, 1.5, 3):
+        h.observe(v)
+    assert (h.quantile(0.25), h.quantile(0.75), h.quantile(1)) == (1, 2, float("inf"))
+
+
+def blocked_pool(**kwargs) -> tuple[SmartThreadPool, threading.Event]:
+    """单线程的池，唯一的线程被占用，之后 submit_task 的任务都会排队"""
+    pool = SmartThreadPool(max_workers=1, **kwargs)
+    gate = threading.Event()
+    pool.submit_task(gate.wait, (5,))
+    return pool, gate
+
+
+def test_submit_task_priority_then_fifo():
+    pool, gate = blocked_pool()
+    order = []
+    for name, priority in [("a", 0), ("b", 5), ("c", 0), ("d", 5), ("e", -1), ("f", 9)]:
+        pool.submit_task(order.append, (name,), priority=priority)
+    gate.set()
+    pool.shutdown()
+    assert order == ["f", "b", "d", "a", "c", "e"]
+
+
+def test_submit_task_max_per_key():
+    pool = SmartThreadPool(max_workers=4, max_per_key=1)
+    lock = threading.Lock()
+    running, peak = {}, {}
+
+    def job(key):
+        with lock:
+            running[key] = running.get(key, 0) + 1
+            peak[key] = max(peak.get(key, 0), running[key])
+        time.sleep(0.02)
+        with lock:
+            running[key] -= 1
+
+    for i in range(12):
+        key = "slow" if i < 8 else "fast{}".format(i)
+        pool.submit_task(job, (key,), key=key)
+    pool.shutdown()
+    assert peak["slow"] == 1
+    assert all(peak["fast{}".format(i)] == 1 for i in range(8, 12))
+
+
+def test_submit_task_cancel_queued():
+    pool, gate = blocked_pool()
+    calls = []
+    future = pool.submit_task(calls.append, (1,))
+    after = pool.submit_task(calls.append, (2,))
+    assert future.cancel()
+    gate.set()
+    pool.shutdown()
+    assert future.cancelled() and after.done()
+    assert calls == [2]
+
+
+def test_submit_task_max_pending_blocks():
+    pool, gate = blocked_pool(max_pending=2)
+    pool.submit_task(time.sleep, (0,))
+    pool.submit_task(time.sleep, (0,))
+    submitted = threading.Event()
+    threading.Thread(target=lambda: (pool.submit_task(time.sleep, (0,)), submitted.set()), daemon=True).start()
+    assert not submitted.wait(0.2)
+    assert pool.pending == 2
+    gate.set()
+    assert submitted.wait(5)
+    pool.shutdown()
+
+
+def test_shutdown_drains_queue():
+    pool, gate = blocked_pool()
+    futures = [pool.submit_task(pow, (i, 2)) for i in range(20)]
+    threading.Timer(0.1, gate.set).start()
+    pool.shutdown()
+    assert [f.result(0) for f in futures] == [i * i for i in range(20)]
+    assert pool.pending == 0 and not pool.queues and not pool.key_running
+
+
+def test_process_pool_shared_memory_unlinked(monkeypatch):
+    created = []
+
+    class Recorded(process_pool._SharedBytes):
+        def __init__(self, data):
+            super().__init__(data)
+            created.append(self.shm.name)
+
+    monkeypatch.setattr(process_pool, "_SharedBytes", Recorded)
+    blob = os.urandom(64 * 1024)
+    with SmartProcessPool(max_workers=2, share_threshold=1024) as pool:
+        ok = [pool.submit(zlib.crc32, blob), pool.submit_task(zlib.crc32, (blob,), priority=1)]
+        failed = [pool.submit(int, blob), pool.submit_task(int, (blob,))]  # 随机字节不是数字，任务失败
+        small = pool.submit_task(zlib.crc32, (b"small",))
+    assert [f.result() for f in ok] == [zlib.crc32(blob)] * 2
+    assert all(isinstance(f.exception(), ValueError) for f in failed)
+    assert small.result() == zlib.crc32(b"small")
+    assert len(created) == 4
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
+
+
+def test_process_pool_max_tasks_per_child():
+    with SmartProcessPool(max_workers=1, max_tasks_per_child=2) as pool:
+        pids = [pool.submit(os.getpid).result() for _ in range(6)]
+    assert [len(set(pids[i:i + 2])) for i in range(0, 6, 2)] == [1, 1, 1]
+    assert len(set(pids)) == 3
+    assert isinstance(pool.pool, process_pool.ProcessPoolExecutor)
+
+
+def feed_round(limit: AdaptiveLimit, latency: float, errors=0, in_flight: int = None) -> int:
+    """喂一轮（刚好触发一次评估）合成的任务结果，前 errors 个失败"""
+    for i in range(max(limit.limit, limit.min_samples)):
+        limit.record(latency, i >= errors, limit.limit if in_flight is None else in_flight)
+    return limit.limit
+
+
+def test_adaptive_limit_grows_shrinks_within_bounds():
+    limit = AdaptiveLimit(min_limit=2, max_limit=16, min_samples=4, baseline_window=3)
+    assert [feed_round(limit, 0.01) for _ in range(4)] == [4, 8, 16, 16]  # 慢启动翻倍，不超过 max_limit
+    assert feed_round(limit, 0.01, in_flight=1) == 16  # 没有达到 limit，不增加
+    assert feed_round(limit, 0.05) == 11  # 变慢超过 tolerance 倍，乘以 decrease
+    assert feed_round(limit, 0.01) == 12  # 慢启动结束后每轮加 increase
+    assert [feed_round(limit, 0.01, errors=limit.limit) for _ in range(5)] == [8, 5, 3, 2, 2]  # 失败率过高，不低于 min_limit
+    assert [feed_round(limit, 0.05) for _ in range(6)] == [2, 2, 3, 4, 5, 6]  # 基准耗时随最近几轮更新后恢复增长
+    assert all(2 <= n <= 16 for _, n in limit.history)
+    assert limit.stats()["limit"] == 6 and not limit.stats()["slow_start"]
+
+
+def test_adaptive_done_updates_max_in_flight():
+    pool = SmartThreadPool(max_workers=8, adaptive=AdaptiveLimit(min_limit=1, max_limit=8, min_samples=1))
+    ok, failed = Future(), Future()
+    ok.set_result(None)
+    failed.set_exception(ValueError())
+    seen = []
+    for future in [ok] * 4 + [failed] * 5:  # 每轮 limit 个任务
+        for _ in range(pool.adaptive.limit):
+            with pool.condition:
+                pool.current_tasks = pool.max_in_flight  # 模拟并发数达到上限时完成了一个任务
+            pool._adaptive_done(time.perf_counter() - 0.01, future)
+        assert pool.max_in_flight == pool.adaptive.limit
+        seen.append(pool.max_in_flight)
+    pool.shutdown()
+    assert seen == [2, 4, 8, 8, 5, 3, 2, 1, 1]
+
+
+def test_imap_order_and_chunksize():
+    pool = SmartThreadPool(max_workers=4)
+    calls = []
+    submit = pool.submit
+    pool.submit = lambda fn, *args: calls.append(len(args[1])) or submit(fn, *args)
+    results = list(pool.imap(lambda i: time.sleep((i % 3) * 0.005) or i * 2, range(23), chunksize=5))
+    assert results == [i * 2 for i in range(23)]
+    assert calls == [5, 5, 5, 5, 3]
+    assert sorted(pool.imap_unordered(abs, range(-10, 0), chunksize=3)) == list(range(1, 11))
+    pool.shutdown()
+
+
+def test_imap_timeout():
+    pool = SmartThreadPool(max_workers=4)
+    results = list(pool.imap(time.sleep, [0, 0.5, 0], timeout=0.1, return_exceptions=True))
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], TimeoutError)
+    with pytest.raises(TimeoutError):
+        list(pool.imap_unordered(time.sleep, [0.5], timeout=0.1))
+    pool.shutdown()
+
+
+def test_imap_timeout_starts_after_submit():
+    pool = SmartThreadPool(max_workers=1)
+    pool.submit(time.sleep, 0.3)  # 占满并发数，imap 的 submit 要等它结束
+    assert list(pool.imap(abs, [-1, -2], timeout=0.2)) == [1, 2]
+    pool.shutdown()
+
+
+def test_imap_close_early_cancels_queued():
+    pool = SmartThreadPool(max_workers=2)
+    consumed, started = [], []
+
+    def source():
+        for i in range(1000):
+            consumed.append(i)
+            yield i
+
+    def job(i):
+        started.append(i)
+        time.sleep(0.01)
+        return i
+
+    results = pool.imap(job, source(), max_in_flight=4)
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    results.close()
+    pool.shutdown()
+    assert len(consumed) <= 8  # 只读取了需要的输入
+    assert len(started) < len(consumed)  # 还没开始的任务被取消了
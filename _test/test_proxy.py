@@ -0,0 +1,106 @@
+import random
+from collections import Counter
+
+import pytest
+
+from wauo import WauoSpider
+from wauo.spiders import proxy as proxy_module
+from wauo.spiders.proxy import ProxyPool
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    """固定 proxy 模块的时间和随机数，结果可以复现"""
+    clock = FakeClock()
+    monkeypatch.setattr(proxy_module, "time", clock)
+    monkeypatch.setattr(proxy_module, "random", random.Random(42))
+    return clock
+
+
+def train(pool: ProxyPool, proxy: str, successes: int, failures: int, latency: float):
+    """交替反馈成功和失败（failures 不大于 successes 时不会连续失败，不会触发冷却）"""
+    for i in range(max(successes, failures)):
+        if i < successes:
+            pool.report(proxy, True, latency)
+        if i < failures:
+            pool.report(proxy, False, latency)
+
+
+def picks(pool: ProxyPool, n=3000) -> Counter:
+    return Counter(pool.pick() for _ in range(n))
+
+
+def test_cooldown_after_consecutive_failures(clock):
+    pool = ProxyPool(["a", "b"], max_failures=3, cooldown=60)
+    pool.report("a", False)
+    pool.report("a", False)
+    pool.report("a", True)  # 成功后重新计数
+    pool.report("a", False)
+    pool.report("a", False)
+    assert not any(s["cooling"] for s in pool.status())
+
+    pool.report({"http": "a", "https": "a"}, False)
+    assert [s["cooling"] for s in pool.status()] == [True, False]
+    assert set(picks(pool, 100)) == {"b"}
+
+    clock.now += 30
+    for _ in range(3):
+        pool.report("b", False)
+    assert pool.pick() == "a"  # 都在冷却时选择最早结束冷却的
+
+    clock.now += 31
+    assert set(picks(pool, 100)) == {"a"}  # a 冷却结束，b 还在冷却
+    clock.now += 30
+    assert set(picks(pool, 100)) == {"a", "b"}
+
+    pool.report("unknown", False)  # 不在池中的代理被忽略
+    assert len(pool) == 2
+
+
+def test_p2c_prefers_cheaper(clock):
+    pool = ProxyPool(["good", "mid", "bad"], strategy="p2c")
+    train(pool, "good", 10, 0, 0.1)
+    train(pool, "mid", 10, 0, 0.3)
+    train(pool, "bad", 5, 5, 0.3)
+    counts = picks(pool)
+    # 两次随机选择中取代价小的：最好的被选中的概率是 5/9，最差的只有两次都抽到它时（1/9）
+    assert counts["good"] > counts["mid"] > counts["bad"]
+    assert abs(counts["good"] / 3000 - 5 / 9) < 0.05
+    assert abs(counts["bad"] / 3000 - 1 / 9) < 0.05
+
+    pool.add("new")  # 没有记录的代理代价为 0，抽到就会被选中
+    assert picks(pool)["new"] > 3000 * (1 - (3 / 4) ** 2) * 0.9
+
+
+def test_weighted_by_inverse_cost(clock):
+    pool = ProxyPool(["fast", "slow"], strategy="weighted")
+    train(pool, "fast", 10, 0, 0.1)
+    train(pool, "slow", 10, 0, 0.3)
+    counts = picks(pool)
+    assert abs(counts["fast"] / 3000 - 0.75) < 0.05  # 权重 1/0.1 : 1/0.3 = 3 : 1
+
+    pool.add("new")
+    assert set(picks(pool, 100)) == {"new"}  # 有未试用的代理时先试用
+
+
+def test_bad_statuses_reported(base):
+    pool = ProxyPool([base], bad_statuses=(403,), max_failures=2)
+    spider = WauoSpider(proxy_pool=pool)
+    assert spider.go(base + "/ok").status_code == 200
+    assert spider.go(base + "/forbidden?status=403").status_code == 403
+    assert spider.go(base + "/missing?status=404").status_code == 404  # 不在 bad_statuses 中，不算代理失败
+    stat = pool.stats[base]
+    assert [ok for ok, _ in stat.records] == [True, False, True]
+    assert pool.status()[0]["success_rate"] == round(2 / 3, 3)
+
+    spider.go(base + "/forbidden?status=403")
+    spider.go(base + "/forbidden?status=403")
+    assert pool.status()[0]["cooling"]
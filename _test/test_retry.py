@@ -0,0 +1,149 @@
+import asyncio
+import random
+from email.utils import formatdate
+
+import pytest
+from requests import Response
+
+from wauo.spiders import retry
+from wauo.spiders.errors import ResponseTooLargeError
+from wauo.spiders.retry import RetryPolicy
+
+
+class FakeClock:
+    """代替 retry 模块中的 time：时间固定，sleep 只记录等待的秒数"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(retry, "time", clock)
+    return clock
+
+
+def make_response(status: int, retry_after: str = None) -> Response:
+    response = Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return response
+
+
+def raising(error: Exception):
+    def call():
+        raise error
+    return call
+
+
+def test_backoff_and_jitter_bounds(monkeypatch):
+    policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=False)
+    assert [policy.delay(i) for i in range(5)] == [0.5, 1, 2, 3, 3]
+
+    policy = RetryPolicy(backoff=0.5, max_backoff=3)
+    monkeypatch.setattr(retry, "random", random.Random(7))
+    for i in range(5):
+        cap = min(3, 0.5 * 2 ** i)
+        delays = [policy.delay(i) for _ in range(200)]
+        assert all(0 <= d <= cap for d in delays)
+        assert max(delays) > cap * 0.9 and min(delays) < cap * 0.1  # 抖动覆盖整个区间
+
+
+def test_retry_after(clock):
+    policy = RetryPolicy(max_retry_after=60)
+    assert policy.retry_after(make_response(429, "7")) == 7
+    assert policy.retry_after(make_response(503, "600")) == 60  # 不超过 max_retry_after
+    assert policy.retry_after(make_response(503, formatdate(clock.now + 30, usegmt=True))) == 30
+    assert policy.retry_after(make_response(503, formatdate(clock.now - 30, usegmt=True))) == 0  # 已经过去的时间
+    assert policy.retry_after(make_response(503, "soon")) is None
+    assert policy.retry_after(make_response(500, "7")) is None  # 只认 429 / 503
+    assert policy.delay(0, make_response(429, "7")) == 7
+    assert policy.delay(0, make_response(429, "soon")) <= policy.backoff  # 无法解析时按退避等待
+
+
+def test_run_retries_until_success(clock):
+    policy = RetryPolicy(max_retries=3, backoff=1, jitter=False)
+    responses = iter([make_response(503, "5"), make_response(500), make_response(200)])
+    calls = []
+
+    def call():
+        calls.append(1)
+        return next(responses)
+
+    assert policy.run(call, "http://x").status_code == 200
+    assert clock.slept == [5, 2]
+    assert len(calls) == 3
+
+
+def test_run_gives_up(clock):
+    policy = RetryPolicy(max_retries=2, backoff=1, jitter=False, exceptions=(ConnectionError,))
+    assert policy.run(lambda: make_response(502), "http://x").status_code == 502  # 重试用完，返回最后一次的响应
+    assert clock.slept == [1, 2]
+
+    with pytest.raises(ConnectionError):
+        policy.run(raising(ConnectionError("reset")), "http://x")
+    assert len(clock.slept) == 4
+
+
+    clock.slept.clear()
+    for error in (ValueError("not retried"), ResponseTooLargeError("too large")):
+        with pytest.raises(type(error)):
+            policy.run(raising(error), "http://x")
+    assert clock.slept == []
+    assert policy.run(lambda: make_response(404), "http://x").status_code == 404
+    assert clock.slept == []
+
+
+def test_budget_exhaustion(clock):
+    policy = RetryPolicy(max_retries=5, backoff=0, jitter=False, budget=0.5, min_retries=2)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        return make_response(500)
+
+    policy.run(call, "http://x")
+    assert len(attempts) == 3  # 初始预算 2，只重试两次
+    assert policy.tokens == 0
+
+    attempts.clear()
+    policy.run(call, "http://x")  # 新请求存入 0.5，不够一次重试
+    assert len(attempts) == 1
+    policy.run(call, "http://x")  # 再存入 0.5，够一次重试
+    assert len(attempts) == 3
+    assert policy.tokens == 0
+
+    for _ in range(10):
+        policy.deposit()
+    assert policy.tokens == 2  # 不超过 min_retries
+
+
+def test_arun(monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    policy = RetryPolicy(max_retries=3, backoff=1, jitter=False, exceptions=(ConnectionError,))
+    outcomes = iter([ConnectionError("reset"), make_response(429, "3"), make_response(200)])
+
+    async def call():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    response = asyncio.run(policy.arun(call, "http://x"))
+    assert response.status_code == 200
+    assert slept == [1, 3]
@@ -0,0 +1,39 @@
+import os
+import threading
+import time
+from multiprocessing import resource_tracker
+
+from wauo.spiders.runner import CrawlRunner
+
+
+def wait_until(condition, timeout=5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def parse(req, resp):
+    """第一次解析 /crash 时让工作进程崩溃（工作进程中执行，必须是模块级的函数）"""
+    marker = os.environ["WAUO_TEST_MARKER"]
+    if req.endswith("/crash") and not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(3)
+    return {"url": req, "title": resp.get_one("//title/text()")}
+
+
+def test_worker_crash_results_not_duplicated(base, tmp_path, monkeypatch):
+    monkeypatch.setenv("WAUO_TEST_MARKER", str(tmp_path / "crashed"))  # 工作进程启动时继承环境变量
+    urls = ["{}/p{}".format(base, i) for i in range(200)] + [base + "/crash"]
+    resource_tracker.ensure_running()  # 第一次启动进程时打开的，不算泄漏
+    fds = len(os.listdir("/proc/self/fd"))
+    runner = CrawlRunner(parse, processes=2, concurrency=4, progress_interval=60)
+    items = list(runner.iter_items(urls))
+    assert sorted(item["url"] for item in items) == sorted(urls)  # 崩溃前后的结果都只出现一次
+    stats = runner.stats()
+    assert stats["ok"] == len(urls) and stats["failed"] == 0 and stats["restarts"] == 1
+    # 崩溃的进程和结束时的进程，它们的任务队列（后台线程）、管道都已释放
+    assert wait_until(lambda: not [t for t in threading.enumerate() if t.name == "QueueFeederThread"])
+    assert len(os.listdir("/proc/self/fd")) <= fds
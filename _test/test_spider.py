@@ -0,0 +1,78 @@
+import gc
+import socket
+import time
+
+from wauo import WauoSpider
+from wauo.spiders.dedup import HashSetFilter, ScalableBloomFilter, canonicalize_url, request_fingerprint
+from wauo.spiders.limiter import RateLimiter
+
+
+def wait_until(condition, timeout=5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        gc.collect()
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_thread_local_sessions_closed_with_threads(base):
+    spider = WauoSpider(thread_local=True)
+    for n in range(5):
+        urls = ["{}/{}/{}".format(base, n, i) for i in range(16)]
+        assert len([r for _, r in spider.fetch_many(urls, concurrency=8)]) == 16
+    assert wait_until(lambda: not spider.sessions), len(spider.sessions)
+
+    spider.client.get(base)  # 主线程的会话一直保留，直到 close
+    assert len(spider.sessions) == 1
+    spider.close()
+    assert not spider.sessions
+
+
+def test_fetch_many_dedup_after_success(base):
+    spider = WauoSpider(dupefilter=ScalableBloomFilter(1000))
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    bad = "http://127.0.0.1:{}/".format(closed.getsockname()[1])  # 没有监听，连接失败
+    closed.close()
+    urls = [base + "/a", base + "/a", bad, bad]
+
+    first = list(spider.fetch_many(urls, concurrency=4, retry_times=0, retry_delay=0))
+    assert sorted(req for req, _ in first) == sorted([base + "/a", bad])  # 同一批中重复的请求只请求一次
+    assert [isinstance(r, Exception) for req, r in first if req == bad] == [True]
+
+    second = list(spider.fetch_many(urls, concurrency=4, retry_times=0, retry_delay=0))
+    assert [req for req, _ in second] == [bad]  # 失败的请求下次还会请求，成功的跳过
+
+
+def test_canonicalize_url_userinfo():
+    assert canonicalize_url("http://u:p1@Example.com:80/x") == "http://u:p1@example.com/x"
+    assert canonicalize_url("http://u:p1@example.com/") != canonicalize_url("http://u:p2@example.com/")
+    assert canonicalize_url("http://u@example.com/") != canonicalize_url("http://example.com/")
+
+
+def test_hashset_filter_save_copy(tmp_path):
+    f = HashSetFilter(str(tmp_path / "seen.bin"), capacity=16)
+    fps = [request_fingerprint("http://example.com/{}".format(i)) for i in range(100)]  # 会扩容几次
+    assert not any(f.add(fp) for fp in fps)
+    f.save(str(tmp_path / "copy.bin"))
+    f.close()
+    copy = HashSetFilter(str(tmp_path / "copy.bin"))
+    assert len(copy) == 100 and all(fp in copy for fp in fps)
+    assert request_fingerprint("http://example.com/x") not in copy
+    copy.close()
+
+
+def test_rate_limiter_evicts_full_buckets():
+    limiter = RateLimiter(rules={"slow.com": (0.001, 1), "fast.com": (1000, 1)}, max_buckets=8)
+    limiter.acquire("slow.com")
+    limiter.acquire("fast.com")
+    time.sleep(0.01)  # fast.com 的桶已经装满，slow.com 的还没有
+    for i in range(100):
+        limiter.acquire("host{}.com".format(i))  # 不限速的桶一直是满的
+        assert len(limiter.buckets) <= 8
+    assert "fast.com" not in limiter.buckets
+    assert "slow.com" in limiter.buckets  # 没装满的桶不能丢，否则会多给令牌
+    assert limiter.try_acquire("slow.com") > 0
+    assert limiter.try_acquire("fast.com") == 0
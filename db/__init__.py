@@ -1,2 +1,19 @@
-from wauo.db.mysql import MysqlClient
-from wauo.db.psql import PostgresqlClient
+from typing import TYPE_CHECKING
+
+from wauo._lazy import lazy_module
+
+if TYPE_CHECKING:
+    from wauo.db.mysql import MysqlClient
+    from wauo.db.pipeline import ItemPipeline
+    from wauo.db.psql import PostgresqlClient
+
+# 数据库驱动（pymysql、dbutils、psycopg2）首次访问时才导入，只用其中一个时不会导入另一个
+_exports = {
+    "ItemPipeline": "wauo.db.pipeline",
+    "MysqlClient": "wauo.db.mysql",
+    "PostgresqlClient": "wauo.db.psql",
+}
+
+__all__ = list(_exports)
+
+__getattr__, __dir__ = lazy_module(__name__, _exports)
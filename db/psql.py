@@ -2,7 +2,7 @@ from contextlib import contextmanager
 
 from loguru import logger as log
 from psycopg2 import OperationalError
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2.pool import ThreadedConnectionPool
 
 
@@ -99,13 +99,13 @@ class PostgresqlClient:
                 raise ValueError("所有记录的字段必须一致")
 
         columns = ", ".join(datas[0].keys())
-        values = ", ".join(["%s"] * len(datas[0]))
-        query = f"INSERT INTO {table} ({columns}) VALUES ({values})"
+        query = f"INSERT INTO {table} ({columns}) VALUES %s"
         params = [tuple(item.values()) for item in datas]
 
         with self.connection() as conn:
             cursor = conn.cursor()
-            cursor.executemany(query, params)
+            # 多行 VALUES 一次发送（executemany 每行一次往返）
+            execute_values(cursor, query, params, page_size=len(params))
             conn.commit()
             return cursor.rowcount
 
@@ -1 +1,17 @@
-from wauo.pool.thread_pool import SmartThreadPool
+from typing import TYPE_CHECKING
+
+from wauo._lazy import lazy_module
+
+if TYPE_CHECKING:
+    from wauo.pool.process_pool import SmartProcessPool
+    from wauo.pool.thread_pool import SmartThreadPool
+
+# 进程池依赖 multiprocessing，首次访问时才导入
+_exports = {
+    "SmartThreadPool": "wauo.pool.thread_pool",
+    "SmartProcessPool": "wauo.pool.process_pool",
+}
+
+__all__ = list(_exports)
+
+__getattr__, __dir__ = lazy_module(__name__, _exports)
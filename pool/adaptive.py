@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+
+
+class AdaptiveLimit:
+    """
+    自适应并发数（AIMD：加性增、乘性减）
+    - 每完成一轮任务（limit 个，至少 min_samples 个）评估一次：成功任务的平均耗时、失败率
+    - 失败率超过 max_error_rate，或者平均耗时超过基准耗时的 tolerance 倍时，limit 乘以 decrease
+    - 否则如果这一轮中并发数达到过 limit（说明 limit 是瓶颈），limit 加 increase；
+      第一次减小之前为慢启动阶段，每轮翻倍，尽快接近合适的值
+    - 基准耗时取最近 baseline_window 轮中最小的平均耗时，目标整体变慢后基准也会随之更新，不会一直压低并发
+    - limit 始终在 [min_limit, max_limit] 之间，history 记录每次变化，用于观察收敛过程
+
+    Args:
+        min_limit: 最小并发数
+        max_limit: 最大并发数
+        initial: 初始并发数，默认为 min_limit
+        increase: 每轮增加多少
+        decrease: 减小时乘以多少
+        tolerance: 平均耗时超过基准耗时多少倍时减小
+        max_error_rate: 失败率超过多少时减小
+        min_samples: 每轮至少多少个任务
+        baseline_window: 基准耗时取最近多少轮的最小值
+    """
+
+    def __init__(
+            self,
+            min_limit=1,
+            max_limit=64,
+            initial: int = None,
+            increase=1,
+            decrease=0.7,
+            tolerance=2.0,
+            max_error_rate=0.1,
+            min_samples=10,
+            baseline_window=50,
+    ):
+        assert 1 <= min_limit <= max_limit and 0 < decrease < 1
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(initial or min_limit, min_limit), max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+
+        self.lock = threading.Lock()
+        self.slow_start = True
+        self.recent = deque(maxlen=baseline_window)  # 最近几轮的平均耗时（秒）
+        self.last_latency = 0.0
+        self.last_error_rate = 0.0
+        self.changes = 0
+        self.history = deque([(time.time(), self.limit)], maxlen=1000)  # (时间, limit)
+        self._reset()
+
+    def _reset(self):
+        self.samples = 0
+        self.latency_sum = 0.0
+        self.errors = 0
+        self.saturated = False
+
+    def record(self, latency: float, ok: bool, in_flight: int) -> int:
+        """
+        记录一个完成的任务，返回新的 limit
+
+        Args:
+            latency: 任务耗时（秒）
+            ok: 是否成功
+            in_flight: 任务完成时（包括它自己）正在执行的任务数
+        """
+        with self.lock:
+            self.samples += 1
+            if ok:
+                self.latency_sum += latency
+            else:
+                self.errors += 1
+            self.saturated = self.saturated or in_flight >= self.limit
+            if self.samples < max(self.limit, self.min_samples):
+                return self.limit
+
+            error_rate = self.errors / self.samples
+            avg = self.latency_sum / (self.samples - self.errors) if self.errors < self.samples else None
+            self.last_error_rate = error_rate
+            if avg is not None:  # 失败的任务往往很快结束，不参与耗时的计算
+                self.last_latency = avg
+                self.recent.append(avg)
+
+            old = self.limit
+            if error_rate > self.max_error_rate or (avg is not None and avg > self.baseline * self.tolerance):
+                self.limit = max(self.min_limit, int(self.limit * self.decrease))
+                self.slow_start = False
+            elif self.saturated:
+                step = self.limit if self.slow_start else self.increase
+                self.limit = min(self.max_limit, self.limit + step)
+            self._reset()
+            if self.limit != old:
+                self.changes += 1
+                self.history.append((time.time(), self.limit))
+            return self.limit
+
+    @property
+    def baseline(self) -> float:
+        """基准耗时（秒）"""
+        return min(self.recent, default=0.0)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "limit": self.limit,
+                "slow_start": self.slow_start,
+                "baseline_ms": round(self.baseline * 1000, 2),
+                "latency_ms": round(self.last_latency * 1000, 2),
+                "error_rate": round(self.last_error_rate, 4),
+                "changes": self.changes,
+            }
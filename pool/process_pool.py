@@ -0,0 +1,134 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+from wauo.pool.thread_pool import SmartThreadPool
+
+
+def _attach(name: str, size: int) -> bytes:
+    """在子进程中反序列化时调用：从共享内存中读取数据"""
+    shm = SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+
+
+class _SharedBytes:
+    """大块 bytes 参数：数据写入共享内存，序列化时只传递共享内存的名字，子进程中反序列化得到原来的 bytes"""
+
+    def __init__(self, data: bytes | bytearray | memoryview):
+        size = len(data)
+        self.shm = SharedMemory(create=True, size=max(size, 1))
+        self.shm.buf[:size] = data
+        self.size = size
+
+    def __reduce__(self):
+        return _attach, (self.shm.name, self.size)
+
+    def release(self, *_):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SmartProcessPool(SmartThreadPool):
+    """
+    智能进程池（用于解析 HTML、计算哈希、转换 JSON 等 CPU 密集型任务，不受 GIL 限制）
+    - 与 SmartThreadPool 用法相同：submit 达到 max_in_flight 时阻塞，map / imap / imap_unordered，上下文管理器
+    - initializer 在每个工作进程启动时执行一次，用于创建进程级的对象（例如每个进程一个 WauoSpider 或者数据库连接）
+    - 每个工作进程执行 max_tasks_per_child 个任务后由新进程替换，避免内存泄漏持续累积（需要 Python 3.11+）
+    - 大于 share_threshold 字节的 bytes 参数通过共享内存传递（submit、submit_task 都支持），不经过管道，任务结束后自动释放
+    - 函数、参数和返回值需要能被 pickle，函数需要定义在模块级
+
+    Args:
+        max_workers: 工作进程数，默认为 CPU 核数
+        max_in_flight: 最多同时提交多少个任务，默认为 max_workers * 2（多出的任务在管道中排队，工作进程不会空等）
+        initializer: 工作进程的初始化函数
+        initargs: 初始化函数的参数
+        max_tasks_per_child: 每个工作进程最多执行多少个任务
+        share_threshold: bytes 参数超过多少字节时使用共享内存
+    """
+
+    def __init__(
+            self,
+            max_workers: int = None,
+            max_in_flight: int = None,
+            initializer=None,
+            initargs=(),
+            max_tasks_per_child: int = None,
+            share_threshold=1024 * 1024,
+    ):
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_tasks_per_child and sys.version_info < (3, 11):
+            raise ValueError("max_tasks_per_child 需要 Python 3.11+")
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_tasks_per_child = max_tasks_per_child
+        self.share_threshold = share_threshold
+        super().__init__(max_workers)
+        self.max_in_flight = max_in_flight or max_workers * 2
+
+    def _make_executor(self):
+        """创建进程池"""
+        kwargs = dict(max_workers=self.max_workers, initializer=self.initializer, initargs=self.initargs)
+        if self.max_tasks_per_child:
+            # fork 会复制父进程中的锁和线程状态，替换进程时可能死锁
+            kwargs.update(max_tasks_per_child=self.max_tasks_per_child, mp_context=get_context("spawn"))
+        return ProcessPoolExecutor(**kwargs)
+
+    def _share(self, value, shared: list):
+        """把大块 bytes 换成共享内存，会进入 list / tuple 中查找（imap 的参数是按批打包的）"""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            if len(value) > self.share_threshold:
+                value = _SharedBytes(value)
+                shared.append(value)
+        elif type(value) in (list, tuple):
+            value = type(value)(self._share(v, shared) for v in value)
+        return value
+
+    def _share_args(self, args, kwargs: dict) -> tuple[list, dict, list]:
+        """把参数中的大块 bytes 换成共享内存，返回 (args, kwargs, 共享内存列表)"""
+        shared = []
+        args = [self._share(v, shared) for v in args]
+        kwargs = {k: self._share(v, shared) for k, v in kwargs.items()}
+        return args, kwargs, shared
+
+    @staticmethod
+    def _release_when_done(future, shared: list):
+        """任务结束（包括失败、取消）后释放共享内存"""
+        for v in shared:
+            future.add_done_callback(v.release)
+        return future
+
+    def submit(self, fn, *args, **kwargs):
+        """提交任务，如果达到最大并发数则阻塞"""
+        args, kwargs, shared = self._share_args(args, kwargs)
+        try:
+            future = super().submit(fn, *args, **kwargs)
+        except BaseException:
+            for v in shared:
+                v.release()
+            raise
+        return self._release_when_done(future, shared)
+
+    def submit_task(self, fn, args=(), kwargs: dict = None, priority=0, key=None):
+        """提交任务到池内的优先级队列，参数同 SmartThreadPool.submit_task，大块 bytes 参数同样通过共享内存传递"""
+        args, kwargs, shared = self._share_args(args, kwargs or {})
+        try:
+            future = super().submit_task(fn, tuple(args), kwargs, priority, key)
+        except BaseException:
+            for v in shared:
+                v.release()
+            raise
+        return self._release_when_done(future, shared)
+
+
+if __name__ == "__main__":
+    import zlib
+
+    blobs = [os.urandom(4 * 1024 * 1024) for _ in range(8)]  # 超过 1MB，通过共享内存传递
+    with SmartProcessPool(max_workers=4, max_tasks_per_child=100) as pool:
+        for checksum in pool.imap(zlib.crc32, blobs):
+            print(checksum)
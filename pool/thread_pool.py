@@ -1,34 +1,191 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor, TimeoutError, as_completed, wait
+from functools import partial
+from heapq import heappop, heappush
+from itertools import count, islice
 import threading
+import time
+
+from wauo.pool.adaptive import AdaptiveLimit
+
+
+def _run_chunk(fn, chunk):
+    """在一个线程中依次执行一批任务，返回 [(是否成功, 结果或者异常), ...]"""
+    outcomes = []
+    for args in chunk:
+        try:
+            outcomes.append((True, fn(*args)))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
 
 
 class SmartThreadPool:
     """
     智能线程池
     - 当有任务提交时，如果达到了最大并发数，则阻塞，直到有线程执行结束释放了资源
+    - adaptive 模式下最大并发数根据任务耗时和失败率自动调整（见 AdaptiveLimit），当前值为 max_in_flight
+    - submit_task 提交的任务先在池内排队，有空闲时优先执行 priority 大的任务；
+      同一个 key（例如域名）最多同时执行 max_per_key 个，慢的域名不会占满所有线程
+
+    Args:
+        max_workers: 线程数（最大并发数）
+        adaptive: True 时在 [1, max_workers] 之间自动调整并发数，也可以传入 AdaptiveLimit 自定义参数
+        max_per_key: submit_task 中同一个 key 最多同时执行多少个任务，默认不限制
+        max_pending: submit_task 最多允许多少个任务排队，超过时阻塞
     """
 
-    def __init__(self, max_workers=10):
+    def __init__(
+            self,
+            max_workers=10,
+            adaptive: bool | AdaptiveLimit = False,
+            max_per_key: int = None,
+            max_pending=10000,
+    ):
+        if adaptive is True:
+            adaptive = AdaptiveLimit(max_limit=max_workers)
+        self.adaptive: AdaptiveLimit | None = adaptive or None
+        if self.adaptive is not None:
+            max_workers = max(max_workers, self.adaptive.max_limit)
         self.max_workers = max_workers
-        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_in_flight = self.adaptive.limit if self.adaptive else max_workers  # 最多同时提交多少个任务
+        self.pool = self._make_executor()
         self.current_tasks = 0
-        self.condition = threading.Condition()
+        lock = threading.RLock()
+        self.condition = threading.Condition(lock)  # 等待空闲线程
+
+        self.max_per_key = max_per_key
+        self.max_pending = max_pending
+        self.queue_space = threading.Condition(lock)  # 等待排队的位置
+        self.seq = count()
+        self.pending = 0  # submit_task 排队中的任务数
+        self.queues: dict = {}  # key => 该 key 排队中的任务（堆）
+        self.ready = []  # 可以执行的 key 的队首任务 (-priority, 序号, key)，取出时再检查是否过期
+        self.key_running: dict = {}  # key => 正在执行的任务数
+        self.dispatching = False
+
+    def _make_executor(self):
+        """创建执行任务的 Executor，子类可以覆盖（例如进程池）"""
+        return ThreadPoolExecutor(max_workers=self.max_workers)
 
     def submit(self, fn, *args, **kwargs):
         """提交任务，如果达到最大并发数则阻塞"""
         with self.condition:
-            self.condition.wait_for(lambda: self.current_tasks < self.max_workers)  # 等待，直到有空闲线程
+            self.condition.wait_for(lambda: self.current_tasks < self.max_in_flight)  # 等待，直到有空闲线程
             self.current_tasks += 1
             future = self.pool.submit(fn, *args, **kwargs)
-            future.add_done_callback(self._task_done)
+            if self.adaptive is None:
+                future.add_done_callback(self._task_done)
+            else:
+                future.add_done_callback(partial(self._adaptive_done, time.perf_counter()))
         return future
 
+    def submit_task(self, fn, args=(), kwargs: dict = None, priority=0, key=None) -> Future:
+        """
+        提交任务到池内的优先级队列，排队的任务达到 max_pending 时阻塞
+
+        Args:
+            fn: 要执行的函数
+            args: 位置参数
+            kwargs: 关键字参数
+            priority: 优先级，越大越先执行，相同时先提交的先执行
+            key: 公平调度的键（例如域名），同一个 key 最多同时执行 max_per_key 个任务；为 None 时不限制
+        Returns:
+            Future，可以 result() 获取返回值，开始执行前可以 cancel()
+
+        注意：任务中再调用 submit_task 时，如果排队已满，会阻塞当前的工作线程；
+        所有工作线程都这样阻塞时没有线程能让队列变短，会死锁，这种场景需要足够大的 max_pending
+        """
+        with self.condition:
+            self.queue_space.wait_for(lambda: self.pending < self.max_pending)
+            future = Future()
+            entry = (-priority, next(self.seq), fn, args, kwargs or {}, future)
+            queue = self.queues.setdefault(key, [])
+            heappush(queue, entry)
+            self.pending += 1
+            if queue[0] is entry and self._key_free(key):
+                heappush(self.ready, (entry[0], entry[1], key))
+            self._dispatch()
+        return future
+
+    def _key_free(self, key) -> bool:
+        return key is None or self.max_per_key is None or self.key_running.get(key, 0) < self.max_per_key
+
+    def _dispatch(self):
+        """有空闲线程时，执行排队的任务中优先级最高的（需要持有锁）"""
+        if self.dispatching:
+            return  # 任务瞬间完成时回调会在这里重入，由外层的循环继续处理
+        self.dispatching = True
+        try:
+            while self.ready and self.current_tasks < self.max_in_flight:
+                _, seq, key = heappop(self.ready)
+                queue = self.queues.get(key)
+                if not queue or queue[0][1] != seq or not self._key_free(key):
+                    continue  # 已经过期
+                _, _, fn, args, kwargs, future = heappop(queue)
+                if not queue:
+                    del self.queues[key]
+                self.pending -= 1
+                if self.pending:
+                    self.queue_space.notify()
+                else:
+                    self.queue_space.notify_all()  # 唤醒 shutdown
+                running = future.set_running_or_notify_cancel()  # 已经被取消时返回 False
+                if running:
+                    self.current_tasks += 1
+                    self.key_running[key] = self.key_running.get(key, 0) + 1
+                if queue and self._key_free(key):  # 队首换成了下一个任务
+                    heappush(self.ready, (queue[0][0], queue[0][1], key))
+                if running:
+                    inner = self.pool.submit(fn, *args, **kwargs)
+                    inner.add_done_callback(partial(self._entry_done, key, future, time.perf_counter()))
+        finally:
+            self.dispatching = False
+
+    def _entry_done(self, key, future: Future, started: float, inner: Future):
+        """submit_task 的任务完成时的回调：释放 key 的名额，把结果转交给返回给调用方的 future"""
+        with self.condition:
+            n = self.key_running[key] - 1
+            if n:
+                self.key_running[key] = n
+            else:
+                del self.key_running[key]
+            queue = self.queues.get(key)
+            if queue and self._key_free(key):
+                heappush(self.ready, (queue[0][0], queue[0][1], key))
+        if inner.cancelled():
+            future.set_exception(CancelledError())
+        elif inner.exception() is not None:
+            future.set_exception(inner.exception())
+        else:
+            future.set_result(inner.result())
+        if self.adaptive is None:
+            self._task_done(inner)
+        else:
+            self._adaptive_done(started, inner)
+
     def _task_done(self, future):
         """任务完成时的回调"""
         with self.condition:
             self.current_tasks -= 1
+            self._dispatch()
             self.condition.notify()  # 通知等待的线程
 
+    def _adaptive_done(self, started: float, future):
+        """adaptive 模式下任务完成时的回调：根据耗时和是否成功调整最大并发数"""
+        latency = time.perf_counter() - started
+        ok = not future.cancelled() and future.exception() is None
+        with self.condition:
+            limit = self.adaptive.record(latency, ok, self.current_tasks)
+            self.current_tasks -= 1
+            grew = limit > self.max_in_flight
+            self.max_in_flight = limit
+            self._dispatch()
+            if grew:
+                self.condition.notify_all()
+            else:
+                self.condition.notify()
+
     def map(self, fn, *iterables, timeout=None):
         """
         Args:
@@ -37,13 +194,86 @@ class SmartThreadPool:
             timeout: 超时时间（秒）
         Returns:
             返回结果的迭代器（先完成的先返回）
+
+        会先提交所有任务再返回结果，任务很多时使用 imap / imap_unordered
         """
         futures = [self.submit(fn, *args) for args in zip(*iterables)]
         for future in as_completed(futures, timeout=timeout):
             yield future.result()
 
+    def imap(self, fn, *iterables, max_in_flight: int = None, timeout: float = None, chunksize=1, return_exceptions=False):
+        """
+        流式执行，按输入顺序返回结果
+        - 边读取输入边提交，最多 max_in_flight 批任务同时在执行，已完成的结果会立即返回，不会保存所有任务和结果
+        - 前面的任务没有完成时，后面已经完成的结果会等待，需要尽快拿到结果时使用 imap_unordered
+
+        Args:
+            fn: 要执行的函数
+            *iterables: 一个或多个可迭代对象（可以是生成器）
+            max_in_flight: 最多同时执行的批数，默认与 submit 相同（线程池为 max_workers）
+            timeout: 每个任务的超时时间（秒），一批任务的超时时间为 timeout * 批大小；超时的任务不会被中断，只是不再等待它的结果
+            chunksize: 每批任务数，任务很小时增大它可以减少线程调度的开销
+            return_exceptions: 为 True 时把异常（包括 TimeoutError）作为结果返回，否则直接抛出
+        """
+        return self._imap(fn, iterables, True, max_in_flight, timeout, chunksize, return_exceptions)
+
+    def imap_unordered(self, fn, *iterables, max_in_flight: int = None, timeout: float = None, chunksize=1, return_exceptions=False):
+        """流式执行，按完成顺序返回结果（先完成的先返回），参数同 imap"""
+        return self._imap(fn, iterables, False, max_in_flight, timeout, chunksize, return_exceptions)
+
+    def _imap(self, fn, iterables, ordered, max_in_flight, timeout, chunksize, return_exceptions):
+        assert chunksize >= 1
+        tasks = zip(*iterables)
+        running = deque()  # (future, 截止时间, 批大小)，按提交顺序
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < (max_in_flight or self.max_in_flight):
+                    chunk = list(islice(tasks, chunksize))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    future = self.submit(_run_chunk, fn, chunk)  # 可能阻塞，阻塞的时间不计入超时
+                    deadline = time.monotonic() + timeout * len(chunk) if timeout is not None else None
+                    running.append((future, deadline, len(chunk)))
+                if not running:
+                    return
+
+                if ordered:
+                    finished = [running.popleft()]
+                    future, deadline, _ = finished[0]
+                    try:
+                        future.result(None if deadline is None else max(deadline - time.monotonic(), 0))
+                    except TimeoutError:
+                        pass
+                else:
+                    deadlines = [d for _, d, _ in running if d is not None]
+                    left = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+                    wait([f for f, _, _ in running], left, FIRST_COMPLETED)
+                    now = time.monotonic()
+                    finished = [r for r in running if r[0].done() or (r[1] is not None and r[1] <= now)]
+                    for r in finished:
+                        running.remove(r)
+
+                for future, _, size in finished:
+                    if future.done():
+                        outcomes = future.result()
+                    else:
+                        future.cancel()
+                        outcomes = [(False, TimeoutError("任务超时"))] * size
+                    for ok, value in outcomes:
+                        if ok or return_exceptions:
+                            yield value
+                        else:
+                            raise value
+        finally:
+            for future, _, _ in running:  # 提前结束迭代时取消还没有开始的任务
+                future.cancel()
+
     def shutdown(self):
-        """关闭线程池"""
+        """关闭线程池（等待 submit_task 排队的任务执行完）"""
+        with self.condition:
+            self.queue_space.wait_for(lambda: not self.pending)
         self.pool.shutdown()
 
     def __enter__(self):
@@ -85,3 +315,8 @@ if __name__ == "__main__":
     #     results = pool.map(job, range(10))
     #     for result in results:
     #         print(result)
+
+    # 流式处理大量任务（按输入顺序返回，最多 20 批同时执行）
+    # with SmartThreadPool(max_workers=10) as pool:
+    #     for result in pool.imap(job, range(1000000), max_in_flight=20, chunksize=100):
+    #         print(result)
@@ -1,2 +1,19 @@
-from wauo.spiders.response import SelectorResponse
-from wauo.spiders.spiders import WauoSpider
+from typing import TYPE_CHECKING
+
+from wauo._lazy import lazy_module
+
+if TYPE_CHECKING:
+    from wauo.spiders.async_spiders import AsyncWauoSpider
+    from wauo.spiders.response import SelectorResponse
+    from wauo.spiders.spiders import WauoSpider
+
+# 首次访问时才导入（AsyncWauoSpider 会导入 asyncio，只用同步爬虫时不需要）
+_exports = {
+    "AsyncWauoSpider": "wauo.spiders.async_spiders",
+    "SelectorResponse": "wauo.spiders.response",
+    "WauoSpider": "wauo.spiders.spiders",
+}
+
+__all__ = list(_exports)
+
+__getattr__, __dir__ = lazy_module(__name__, _exports)
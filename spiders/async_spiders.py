@@ -0,0 +1,458 @@
+import asyncio
+import codecs
+import os
+import time
+from datetime import timedelta
+from functools import wraps
+from typing import Callable
+from urllib.parse import urlparse
+
+from loguru import logger
+from requests import Request, Response
+from requests.cookies import cookiejar_from_dict
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from wauo.spiders.cache import HttpCache
+from wauo.spiders.dedup import HashSetFilter, ScalableBloomFilter
+from wauo.spiders.download import DownloadProgress, prepare_file
+from wauo.spiders.errors import MaxRetryError, ResponseCodeError, ResponseTooLargeError
+from wauo.spiders.limiter import RateLimiter
+from wauo.spiders.proxy import ProxyPool
+from wauo.spiders.response import SelectorResponse
+from wauo.spiders.retry import RetryPolicy
+from wauo.spiders.spiders import BaseSpider
+
+
+def aretry(func):
+    """请求异常时重试2次（异步版本，爬虫设置了 retry_policy 时，按照重试策略重试）"""
+
+    @wraps(func)
+    async def inner(*args, **kwargs):
+        url = args[1]
+        policy = getattr(args[0], "retry_policy", None)
+        if policy is not None:
+            try:
+                return await policy.arun(lambda: func(*args, **kwargs), url)
+            except Exception as e:
+                logger.critical(f"Failed => {url} | {e}")
+                return None
+        for i in range(3):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                logger.error(
+                    f"""
+                    url         {url}
+                    error       {e}
+                    type        {type(e)}
+                    """
+                )
+                if isinstance(e, ResponseTooLargeError):
+                    break
+        logger.critical(f"Failed => {url}")
+
+    return inner
+
+
+class AsyncWauoSpider(BaseSpider):
+    """
+    异步爬虫类（基于 aiohttp）
+
+    与 WauoSpider 保持相同的 send/go/do/download 用法，只是方法都需要 await：
+    - 默认请求头、代理、超时的合并规则不变
+    - 返回的响应对象同样是 SelectorResponse（可以使用Xpath、CSS）
+    - concurrency 限制全局同时进行的请求数，per_host 限制单个域名同时进行的请求数
+    """
+
+    def __init__(
+            self,
+            is_session=True,
+            default_headers: dict = None,
+            default_proxies: dict = None,
+            default_delay=0,
+            default_timeout=5,
+            ua_way="local",
+            concurrency=100,
+            per_host=10,
+            limiter: RateLimiter = None,
+            cache: HttpCache = None,
+            dupefilter: ScalableBloomFilter | HashSetFilter = None,
+            retry_policy: RetryPolicy = None,
+            proxy_pool: ProxyPool = None,
+            hooks: list[Callable[[dict], None]] = None,
+            slim=False,
+            max_body_size: int = None,
+    ):
+        super().__init__(
+            is_session=False,
+            default_headers=default_headers,
+            default_proxies=default_proxies,
+            default_delay=default_delay,
+            default_timeout=default_timeout,
+            ua_way=ua_way,
+            limiter=limiter,
+            cache=cache,
+            dupefilter=dupefilter,
+            retry_policy=retry_policy,
+            proxy_pool=proxy_pool,
+            hooks=hooks,
+            slim=slim,
+            max_body_size=max_body_size,
+        )
+        self.is_session = is_session
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def get_session(self):
+        """获取 aiohttp 会话（首次使用时创建，必须在事件循环中调用）"""
+        if self.session is None or self.session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+            cookie_jar = aiohttp.CookieJar(unsafe=True) if self.is_session else aiohttp.DummyCookieJar()
+            self.session = aiohttp.ClientSession(
+                connector=connector, cookie_jar=cookie_jar, trace_configs=[self.trace_config()]
+            )
+        return self.session
+
+    @staticmethod
+    def trace_config():
+        """记录 DNS 解析、建立连接（包含 TLS 握手）、收到响应头的时刻，写入请求时传入的 trace_request_ctx"""
+        import aiohttp
+
+        def mark(name: str):
+            async def callback(session, ctx, params):
+                if isinstance(ctx.trace_request_ctx, dict):
+                    ctx.trace_request_ctx[name] = time.perf_counter()
+
+            return callback
+
+        config = aiohttp.TraceConfig()
+        config.on_dns_resolvehost_start.append(mark("dns_start"))
+        config.on_dns_resolvehost_end.append(mark("dns_end"))
+        config.on_connection_create_start.append(mark("connect_start"))
+        config.on_connection_create_end.append(mark("connect_end"))
+        config.on_request_end.append(mark("headers"))
+        return config
+
+    async def close(self):
+        """关闭会话，释放连接"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    @staticmethod
+    def pick_proxy(url: str, proxies: dict) -> str | None:
+        """把 requests 风格的 proxies 转换为 aiohttp 使用的单个代理地址"""
+        if not proxies:
+            return None
+        scheme = urlparse(url).scheme
+        return proxies.get(scheme) or proxies.get("all")
+
+    async def request(
+            self,
+            url: str,
+            headers: dict,
+            params: dict = None,
+            data: dict | str = None,
+            json: dict = None,
+            proxies: dict = None,
+            timeout: float | int = None,
+            **kwargs,
+    ) -> SelectorResponse:
+        """发送一次请求（不重试），默认为GET请求，传递了data或者json参数则为POST请求"""
+        import aiohttp
+
+        method = "GET" if data is None and json is None else "POST"
+        t0 = time.perf_counter()
+        if self.cache is not None:
+            key = self.cache.make_key(method, url, params, data if json is None else json)
+            entry, fresh = self.cache.lookup(key)
+            if fresh:
+                return self.track(url, method, {}, self.cache.to_response(entry))
+            if entry is not None:
+                headers = headers | self.cache.validators(entry)
+
+        if self.limiter is not None:
+            await self.limiter.async_acquire(self.limiter.key_of(url))
+        session = self.get_session()
+        start = time.time()
+        begin = time.perf_counter()
+        marks = {}
+        try:
+            async with session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    params=params,
+                    data=data,
+                    json=json,
+                    proxy=self.pick_proxy(url, proxies),
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                    trace_request_ctx=marks,
+                    **kwargs,
+            ) as resp:
+                content = await (resp.read() if self.max_body_size is None else self.read_body(resp))
+        except Exception as e:
+            self.report_proxy(proxies, start)
+            self.track(url, method, {"wait": begin - t0, "total": time.perf_counter() - t0}, error=e)
+            raise
+        end = time.perf_counter()
+        self.report_proxy(proxies, start, resp.status)
+
+        headers_at = marks.get("headers", end)
+        timings = {"wait": begin - t0}
+        if "dns_end" in marks:
+            timings["dns"] = marks["dns_end"] - marks["dns_start"]
+        if "connect_end" in marks:
+            timings["connect"] = marks["connect_end"] - marks["connect_start"]
+        timings.update(ttfb=headers_at - begin, download=end - headers_at, total=end - t0)
+
+        response = Response()
+        response.status_code = resp.status
+        response.reason = resp.reason
+        response.url = str(resp.url)
+        response.headers = CaseInsensitiveDict(resp.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.cookies = cookiejar_from_dict({k: v.value for k, v in resp.cookies.items()})
+        response.elapsed = timedelta(seconds=headers_at - begin)
+        response.request = Request(method, url, headers=headers).prepare()
+        response._content = content
+
+        if self.cache is not None:
+            if response.status_code == 304 and entry is not None:
+                self.cache.refresh(key, entry, response)
+                return self.track(url, method, timings, self.cache.to_response(entry))
+            self.cache.save(key, response)
+        return self.track(url, method, timings, SelectorResponse(response))
+
+    async def read_body(self, resp) -> bytes:
+        """分块读取响应体，超过 max_body_size 时中断并抛出 ResponseTooLargeError"""
+        limit = self.max_body_size
+        if resp.content_length is not None and resp.content_length > limit:
+            resp.close()
+            raise ResponseTooLargeError("Content-Length {} > {} => {}".format(resp.content_length, limit, resp.url))
+        chunks, size = [], 0
+        async for chunk in resp.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > limit:
+                resp.close()
+                raise ResponseTooLargeError("body > {} => {}".format(limit, resp.url))
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    @aretry
+    async def send(
+            self,
+            url: str,
+            headers: dict = None,
+            params: dict = None,
+            data: dict | str = None,
+            json: dict = None,
+            proxies: dict = None,
+            timeout: float | int = None,
+            cookie: str = None,
+            delay: int | float = None,
+            dont_filter=False,
+            **kwargs,
+    ) -> SelectorResponse:
+        """
+        发送请求，获取响应（与 BaseSpider.send 一致，异常时重试2次）
+
+        Args:
+            cookie: 为headers补充Cookie字段
+            delay: 延迟多少秒后才请求
+            dont_filter: 不经过去重过滤器（设置了 dupefilter 时，请求成功过的请求会直接返回 None）
+            **kwargs: 跟aiohttp的参数保持一致
+
+        Returns:
+            SelectorResponse（可以使用Xpath、CSS）
+        """
+        fp, seen = (None, False) if dont_filter else self.seen(url, params, data, json)
+        if seen:
+            logger.debug("重复的请求 => {}".format(url))
+            return None
+
+        delay = delay or self.default_delay
+        if delay:
+            await asyncio.sleep(delay)
+
+        proxies = proxies or self.get_proxies()
+        timeout = timeout or self.default_timeout
+
+        headers = headers or self.get_headers()
+        if cookie:
+            headers.setdefault("Cookie", cookie)
+        if self.is_merge_default_headers:
+            headers = self.default_headers | headers
+
+        response = await self.request(url, headers, params, data, json, proxies, timeout, **kwargs)
+        if fp is not None:
+            self.dupefilter.add(fp)
+        return response
+
+    async def do(
+            self,
+            url: str,
+            headers: dict = None,
+            params: dict = None,
+            data: dict | str = None,
+            json: dict = None,
+            proxies: dict = None,
+            timeout: int | float = 5,
+            **kwargs,
+    ) -> SelectorResponse:
+        """默认为 GET 请求，传递了 data 或者 json 参数则为 POST 请求"""
+        headers = headers or self.get_headers()
+        if self.is_merge_default_headers:
+            headers = self.default_headers | headers
+        proxies = proxies or self.get_proxies()
+        return await self.request(url, headers, params, data, json, proxies, timeout, **kwargs)
+
+    async def go(
+            self,
+            url: str,
+            headers: dict = None,
+            params: dict = None,
+            data: dict | str = None,
+            json: dict = None,
+            proxies: dict = None,
+            timeout=5,
+            retry_times=2,
+            retry_delay=1,
+            keep_headers=True,
+            dont_filter=False,
+            **kwargs,
+    ) -> SelectorResponse:
+        """
+        获取响应，自带重试
+
+        Args:
+            retry_times: 请求出现异常时，进行重试的次数（设置了 retry_policy 时无效）
+            retry_delay: 重试前先睡眠多少秒（设置了 retry_policy 时无效）
+            keep_headers: 请求时是否保持同一个headers
+            dont_filter: 不经过去重过滤器（设置了 dupefilter 时，请求成功过的请求会直接返回 None）
+            **kwargs: 跟aiohttp的参数保持一致
+
+        Returns:
+            SelectorResponse（可以使用Xpath、CSS）
+        """
+        fp, seen = (None, False) if dont_filter else self.seen(url, params, data, json)
+        if seen:
+            logger.debug("重复的请求 => {}".format(url))
+            return None
+
+        headers = headers or self.get_headers() if keep_headers else {}
+        if headers and self.is_merge_default_headers:
+            headers = self.default_headers | headers
+
+        if self.retry_policy is not None:
+            def call():
+                return self.request(url, headers or self.get_headers(), params, data, json, proxies or self.get_proxies(), timeout, **kwargs)
+
+            try:
+                response = await self.retry_policy.arun(call, url)
+            except Exception as e:
+                if self.is_raise_error:
+                    raise MaxRetryError(url) from e
+                return None
+            if fp is not None:
+                self.dupefilter.add(fp)
+            return response
+
+        for i in range(retry_times + 1):
+            headers = headers or self.get_headers()
+            try:
+                response = await self.request(url, headers, params, data, json, proxies or self.get_proxies(), timeout, **kwargs)
+                if fp is not None:
+                    self.dupefilter.add(fp)
+                return response
+            except Exception as e:
+                logger.error(
+                    f"""
+                    url             {url}
+                    error           {e} => {type(e)}
+                    retry_times     {i}/{retry_times}
+                    """
+                )
+                if isinstance(e, ResponseTooLargeError):
+                    break
+                await asyncio.sleep(retry_delay)
+
+        if self.is_raise_error:
+            raise MaxRetryError(url)
+
+    async def download(
+            self,
+            url: str,
+            save_path: str,
+            is_text_type=False,
+            encoding="UTF-8",
+            chunk_size=1024 * 64,
+            resume=False,
+            progress: Callable[[int, int, float], None] = None,
+            headers: dict = None,
+            proxies: dict = None,
+            timeout: int | float = None,
+    ) -> int:
+        """
+        下载文件（流式写入磁盘，参数含义与 WauoSpider.download 一致，暂不支持分段下载，不受 max_body_size 限制）
+
+        Returns:
+            文件的字节数
+        """
+        import aiohttp
+
+        headers = headers or self.get_headers()
+        if self.is_merge_default_headers:
+            headers = self.default_headers | headers
+        if resume and is_text_type:
+            logger.warning("按文本下载不支持断点续传，重新下载 => {}".format(url))
+        done = os.path.getsize(save_path) if resume and not is_text_type and os.path.exists(save_path) else 0
+        if done:
+            headers = headers | {"Range": "bytes={}-".format(done)}
+        if self.limiter is not None:
+            await self.limiter.async_acquire(self.limiter.key_of(url))
+
+        session = self.get_session()
+        async with session.get(
+                url,
+                headers=headers,
+                proxy=self.pick_proxy(url, proxies or self.get_proxies()),
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=timeout or self.default_timeout),
+        ) as resp:
+            if resp.status == 416:
+                logger.info("文件已下载完成 => {}".format(save_path))
+                return done
+            if resp.status not in (200, 206):
+                raise ResponseCodeError("{} not in [200, 206]".format(resp.status))
+            if resp.status == 200:
+                done = 0
+            bar = DownloadProgress(url, done + resp.content_length if resp.content_length else None, done, progress)
+            prepare_file(save_path)
+            if is_text_type:
+                decoder = codecs.getincrementaldecoder(resp.charset or "UTF-8")(errors="replace")
+                with open(save_path, "w", encoding=encoding) as f:
+                    async for chunk in resp.content.iter_chunked(chunk_size):
+                        f.write(decoder.decode(chunk))
+                        bar.update(len(chunk))
+                    f.write(decoder.decode(b"", final=True))
+            else:
+                with open(save_path, "ab" if done else "wb") as f:
+                    async for chunk in resp.content.iter_chunked(chunk_size):
+                        f.write(chunk)
+                        bar.update(len(chunk))
+        bar.finish()
+        return os.path.getsize(save_path)
+
+    async def get_local_ip(self) -> str:
+        """获取本地IP"""
+        resp = await self.send("https://httpbin.org/ip")
+        return resp.json()["origin"]
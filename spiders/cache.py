@@ -0,0 +1,215 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from requests import Response
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+
+from wauo.spiders.response import SelectorResponse
+
+
+class MemoryCache:
+    """内存缓存（LRU，线程安全）"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None:
+                self.data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: dict):
+        with self.lock:
+            self.data[key] = entry
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+class DiskCache:
+    """磁盘缓存（总大小超过 max_bytes 时，优先删除最久未使用的文件，线程安全）"""
+
+    def __init__(self, path: str, max_bytes=1024 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.sizes = {}
+        for root, _, files in os.walk(path):
+            for name in files:
+                self.sizes[name] = os.path.getsize(os.path.join(root, name))
+        self.total = sum(self.sizes.values())
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key)
+
+    def get(self, key: str) -> dict | None:
+        file = self._file(key)
+        try:
+            with open(file, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(file)
+            return entry
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def set(self, key: str, entry: dict):
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        temp = "{}.{}.tmp".format(file, threading.get_ident())
+        with open(temp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, file)
+        with self.lock:
+            self.total += os.path.getsize(file) - self.sizes.get(key, 0)
+            self.sizes[key] = os.path.getsize(file)
+            if self.total > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+        self.total -= self.sizes.pop(key, 0)
+
+    def _evict(self):
+        """删除最久未使用的文件，直到总大小降到 max_bytes 的 90%"""
+        def used_at(k):
+            try:
+                return os.path.getmtime(self._file(k))
+            except OSError:
+                return 0
+
+        for key in sorted(self.sizes, key=used_at):
+            if self.total <= self.max_bytes * 0.9:
+                break
+            self._remove(key)
+
+
+class HttpCache:
+    """
+    HTTP 响应缓存
+    - 缓存的 key 由 请求方法 + URL（含 params）+ 请求体 组成
+    - 遵循 Cache-Control（no-store、no-cache、max-age）和 Expires，ttl 不为 None 时以 ttl 为准
+    - 缓存过期后，如果有 ETag / Last-Modified，则带上 If-None-Match / If-Modified-Since 重新验证，304 时直接使用缓存
+    - 只缓存状态码为 200 的响应
+
+    Args:
+        store: MemoryCache 或 DiskCache（默认 MemoryCache）
+        ttl: 缓存有效期（秒），覆盖响应头中的缓存策略
+    """
+
+    def __init__(self, store: MemoryCache | DiskCache = None, ttl: int | float = None):
+        self.store = store or MemoryCache()
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(method: str, url: str, params: dict = None, body=None) -> str:
+        if params:
+            req = PreparedRequest()
+            req.prepare_url(url, params)
+            url = req.url
+        hasher = hashlib.md5("{} {}".format(method, url).encode("utf-8"))
+        if body is not None:
+            hasher.update(body if isinstance(body, bytes) else repr(body).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def lookup(self, key: str) -> tuple[dict | None, bool]:
+        """查找缓存，返回 (缓存, 是否仍然新鲜)"""
+        entry = self.store.get(key)
+        if entry is None:
+            return None, False
+        return entry, time.time() < entry["expires_at"]
+
+    @staticmethod
+    def validators(entry: dict) -> dict:
+        """重新验证缓存时需要补充的请求头"""
+        cached, headers = CaseInsensitiveDict(entry["headers"]), {}
+        if cached.get("ETag"):
+            headers["If-None-Match"] = cached["ETag"]
+        if cached.get("Last-Modified"):
+            headers["If-Modified-Since"] = cached["Last-Modified"]
+        return headers
+
+    def lifetime(self, headers) -> float | None:
+        """响应的新鲜期（秒），为 None 表示不能缓存"""
+        directives = {}
+        for part in headers.get("Cache-Control", "").split(","):
+            k, _, v = part.strip().lower().partition("=")
+            if k:
+                directives[k] = v.strip('"')
+        if "no-store" in directives:
+            return None
+        if self.ttl is not None:
+            return self.ttl
+        if "no-cache" in directives:
+            return 0
+        for k in ("s-maxage", "max-age"):
+            if directives.get(k, "").isdigit():
+                return int(directives[k])
+        if headers.get("Expires"):
+            try:
+                return parsedate_to_datetime(headers["Expires"]).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return 0
+        return 0
+
+    def save(self, key: str, response: Response):
+        """保存响应"""
+        if response.status_code != 200:
+            return
+        lifetime = self.lifetime(response.headers)
+        if lifetime is None:
+            return
+        entry = {
+            "url": response.url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "content": response.content,
+            "expires_at": time.time() + lifetime,
+        }
+        if lifetime > 0 or self.validators(entry):
+            self.store.set(key, entry)
+
+    def refresh(self, key: str, entry: dict, response: Response):
+        """收到304后，用新的响应头更新缓存的有效期"""
+        headers = CaseInsensitiveDict(entry["headers"])
+        headers.update({k: v for k, v in response.headers.items() if k.lower() != "content-length"})
+        entry["headers"] = dict(headers)
+        lifetime = self.lifetime(headers)
+        entry["expires_at"] = time.time() + (lifetime or 0)
+        self.store.set(key, entry)
+
+    @staticmethod
+    def to_response(entry: dict) -> SelectorResponse:
+        """把缓存还原为 SelectorResponse"""
+        response = Response()
+        response.url = entry["url"]
+        response.status_code = entry["status_code"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = entry["encoding"]
+        response._content = entry["content"]
+        response.from_cache = True
+        return SelectorResponse(response)
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import math
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_default_ports = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str, params: dict = None) -> str:
+    """
+    规范化 url
+    - scheme、域名转小写，去掉默认端口、锚点，用户名和密码原样保留
+    - 合并 params，并对查询参数排序
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _default_ports.get(scheme):
+        host = "{}:{}".format(host, parts.port)
+    userinfo, at, _ = parts.netloc.rpartition("@")
+    if at:
+        host = "{}@{}".format(userinfo, host)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((str(k), str(v)) for k, v in params.items())
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(sorted(query)), ""))
+
+
+def request_fingerprint(url: str, method="GET", body=None, params: dict = None) -> str:
+    """请求指纹：请求方法 + 规范化的 url + 请求体，同一个请求得到同一个指纹"""
+    hasher = hashlib.sha1()
+    hasher.update(method.upper().encode("utf-8"))
+    hasher.update(canonicalize_url(url, params).encode("utf-8"))
+    if body is not None:
+        if isinstance(body, dict):
+            body = json.dumps(body, sort_keys=True, ensure_ascii=False)
+        hasher.update(body if isinstance(body, bytes) else str(body).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class BloomFilter:
+    """
+    布隆过滤器
+    - capacity: 预计元素个数，error_rate: 超过 capacity 之前的误判率
+    - 不会漏判，只会以 error_rate 的概率把新请求误判为重复
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, fp: str):
+        h1, h2 = int(fp[:16], 16), int(fp[16:32], 16) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, fp: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(fp))
+
+    def add(self, fp: str) -> bool:
+        """添加指纹，返回是否已经存在"""
+        existed = True
+        for p in self._positions(fp):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                existed = False
+                self.bits[p >> 3] |= mask
+        if not existed:
+            self.count += 1
+        return existed
+
+    def __len__(self):
+        return self.count
+
+
+class ScalableBloomFilter:
+    """
+    可扩容的布隆过滤器（线程安全）
+    - 当前过滤器装满后，新建一个容量为 growth 倍、误判率更低的过滤器，总误判率不会超过 error_rate
+    - save / load 用于持久化，下次运行时接着去重
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001, growth=2, ratio=0.5):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.ratio = ratio
+        self.filters = [BloomFilter(capacity, error_rate * (1 - ratio))]
+        self.lock = threading.Lock()
+
+    def __contains__(self, fp: str) -> bool:
+        with self.lock:
+            return any(fp in f for f in self.filters)
+
+    def add(self, fp: str) -> bool:
+        """添加指纹，返回是否已经存在"""
+        with self.lock:
+            if any(fp in f for f in self.filters):
+                return True
+            last = self.filters[-1]
+            if last.count >= last.capacity:
+                last = BloomFilter(last.capacity * self.growth, last.error_rate * self.ratio)
+                self.filters.append(last)
+            last.add(fp)
+            return False
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def save(self, path: str):
+        """保存到磁盘"""
+        with self.lock:
+            state = {k: v for k, v in self.__dict__.items() if k != "lock"}
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "ScalableBloomFilter":
+        """从磁盘加载，文件不存在时按 kwargs 新建"""
+        obj = cls(**kwargs)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                obj.__dict__.update(pickle.load(f))
+        return obj
+
+    def close(self):
+        pass
+
+
+class HashSetFilter:
+    """
+    精确去重（基于 mmap 的开放寻址哈希表，线程安全），只保存指纹的前 64 位，除非 64 位哈希碰撞否则不会误判
+    - 每个指纹只占 8 字节，数据直接保存在文件里，重新打开同一个文件即可接着去重
+    - 装载率超过 0.6 时容量翻倍
+    """
+
+    _header = struct.Struct("<QQ")
+
+    def __init__(self, path: str, capacity=1 << 20):
+        self.path = path
+        self.lock = threading.Lock()
+        if not os.path.exists(path):
+            self._create(path, max(16, 1 << (capacity - 1).bit_length()))
+        self._open()
+
+    def _create(self, path: str, capacity: int):
+        with open(path, "wb") as f:
+            f.write(self._header.pack(0, capacity))
+            f.truncate(self._header.size + capacity * 8)
+
+    def _open(self):
+        self.file = open(self.path, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        self.count, self.capacity = self._header.unpack_from(self.mm, 0)
+        self.slots = memoryview(self.mm)[self._header.size:].cast("Q")
+
+    def _release(self):
+        self.slots.release()
+        self.mm.close()
+        self.file.close()
+
+    @staticmethod
+    def _key(fp: str) -> int:
+        return int(fp[:16], 16) or 1
+
+    def _find(self, key: int) -> tuple[int, bool]:
+        mask = self.capacity - 1
+        i = key & mask
+        while True:
+            v = self.slots[i]
+            if v == key:
+                return i, True
+            if v == 0:
+                return i, False
+            i = (i + 1) & mask
+
+    def __contains__(self, fp: str) -> bool:
+        with self.lock:
+            return self._find(self._key(fp))[1]
+
+    def add(self, fp: str) -> bool:
+        """添加指纹，返回是否已经存在"""
+        key = self._key(fp)
+        with self.lock:
+            i, existed = self._find(key)
+            if existed:
+                return True
+            self.slots[i] = key
+            self.count += 1
+            self._header.pack_into(self.mm, 0, self.count, self.capacity)
+            if self.count > self.capacity * 0.6:
+                self._grow()
+            return False
+
+    def _grow(self):
+        """容量翻倍，逐个搬到新文件中"""
+        temp = self.path + ".tmp"
+        capacity = self.capacity * 2
+        self._create(temp, capacity)
+        with open(temp, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), 0)
+            slots = memoryview(mm)[self._header.size:].cast("Q")
+            mask = capacity - 1
+            for key in self.slots:
+                if key:
+                    i = key & mask
+                    while slots[i]:
+                        i = (i + 1) & mask
+                    slots[i] = key
+            self._header.pack_into(mm, 0, self.count, capacity)
+            slots.release()
+            mm.close()
+        self._release()
+        os.replace(temp, self.path)
+        self._open()
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path: str = None):
+        """刷新到磁盘，给出 path 时另外复制一份到 path"""
+        with self.lock:
+            self.mm.flush()
+            if path is not None and os.path.abspath(path) != os.path.abspath(self.path):
+                temp = path + ".tmp"
+                shutil.copyfile(self.path, temp)
+                os.replace(temp, path)
+
+    def close(self):
+        with self.lock:
+            self.mm.flush()
+            self._release()
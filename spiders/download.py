@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+from loguru import logger
+
+
+class DownloadProgress:
+    """
+    下载进度（线程安全）
+    - 每写入一块数据调用一次 update，回调函数的参数为 (已下载字节数, 总字节数, 速度 B/s)
+    - 总字节数未知时为 None
+    """
+
+    def __init__(self, url: str, total: int = None, done=0, callback: Callable[[int, int, float], None] = None):
+        self.url = url
+        self.total = total
+        self.done = done
+        self.start_done = done
+        self.callback = callback
+        self.start = time.time()
+        self.lock = threading.Lock()
+
+    @property
+    def speed(self) -> float:
+        """本次下载的平均速度（B/s）"""
+        cost = time.time() - self.start
+        return (self.done - self.start_done) / cost if cost > 0 else 0.0
+
+    def update(self, n: int):
+        with self.lock:
+            self.done += n
+            done = self.done
+        if self.callback:
+            self.callback(done, self.total, self.speed)
+
+    def finish(self):
+        cost = time.time() - self.start
+        logger.info(
+            "下载完成 => {} | {:.2f} MB | {:.2f}s | {:.2f} MB/s".format(
+                self.url, self.done / 1024 / 1024, cost, self.speed / 1024 / 1024
+            )
+        )
+
+
+def split_ranges(total: int, n: int) -> list[tuple[int, int]]:
+    """把 [0, total) 切分成 n 段闭区间，用于 Range 请求"""
+    size = -(-total // n)
+    return [(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+
+def prepare_file(path: str, size: int = None):
+    """创建父目录，如果给出了 size 则预分配文件大小"""
+    p_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(p_dir, exist_ok=True)
+    if size is not None:
+        with open(path, "ab") as f:
+            f.truncate(size)
+
+
+def load_segments(path: str, total: int) -> list[list[int]] | None:
+    """读取分段下载的进度文件，返回 [[开始, 结束, 已写入字节数], ...]；不存在或者文件大小对不上时返回 None"""
+    try:
+        with open(path, encoding="UTF-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("total") != total:
+        return None
+    return state["segments"]
+
+
+def save_segments(path: str, total: int, segments: list[list[int]]):
+    """保存分段下载的进度（先写临时文件再替换，中途退出不会留下损坏的进度文件）"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="UTF-8") as f:
+        json.dump({"total": total, "segments": segments}, f)
+    os.replace(tmp, path)
@@ -0,0 +1,87 @@
+"""
+快速识别响应的编码（代替 requests 的 apparent_encoding，大页面上快很多）
+顺序：BOM => 响应头 Content-Type 中的 charset => HTML meta / XML 声明 => UTF-8 能解码则为 UTF-8，否则 GB18030（大多是常用汉字时），最后 cp1252
+"""
+import codecs
+import re
+
+# 使用带 BOM 的编解码器，解码时会去掉 BOM
+_boms = [
+    (codecs.BOM_UTF32_LE, "utf-32"),  # 必须在 UTF-16 之前判断
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_charset = re.compile(r"""charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+_meta = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+_xml = re.compile(rb"""^\s*<\?xml[^>]+?encoding\s*=\s*["']([\w.:-]+)""", re.I)
+
+# 常见的错误声明：按照浏览器的做法使用超集
+_aliases = {"gb2312": "gb18030", "gbk": "gb18030", "iso8859-1": "cp1252", "ascii": "utf-8"}
+
+
+def normalize(name: str | bytes | None) -> str | None:
+    """规范化编码名称，无法识别时返回 None"""
+    if not name:
+        return None
+    if isinstance(name, bytes):
+        name = name.decode("ascii", "ignore")
+    try:
+        name = codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+    return _aliases.get(name, name)
+
+
+def bom_encoding(body: bytes) -> str | None:
+    for bom, name in _boms:
+        if body.startswith(bom):
+            return name
+    return None
+
+
+def header_encoding(headers) -> str | None:
+    """只取响应头中明确声明的 charset（不使用 requests 对 text/* 默认的 ISO-8859-1）"""
+    m = _charset.search(headers.get("Content-Type") or "")
+    return normalize(m.group(1)) if m else None
+
+
+def meta_encoding(body: bytes, limit=4096) -> str | None:
+    """从 HTML meta 或者 XML 声明中获取编码，只检查前 limit 个字节"""
+    head = body[:limit]
+    m = _xml.search(head) or _meta.search(head)
+    return normalize(m.group(1)) if m else None
+
+
+def guess_encoding(body: bytes, limit=64 * 1024) -> str:
+    """
+    没有任何声明时的快速兜底，只检查前 limit 个字节（末尾被截断的多字节字符不算错误）
+    - UTF-8 能解码则为 UTF-8
+    - GB18030 几乎能解码任意高位字节，只有解码出的非 ASCII 字符大多是 GB2312 常用字时才认为是 GB18030，
+      否则是 cp1252（西欧语言的 é、ü 等会被 GB18030 与后一个字节拼成生僻字）
+    """
+    head = memoryview(body)[:limit]
+    final = len(body) <= limit
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        text = codecs.getincrementaldecoder("gb18030")().decode(head, final)
+    except UnicodeDecodeError:
+        return "cp1252"
+    wide = len(text) - len(text.encode("ascii", "ignore"))
+    uncommon = text.encode("gb2312", "replace").count(b"?") - text.count("?")
+    return "gb18030" if uncommon <= wide * 0.2 else "cp1252"
+
+
+def detect_encoding(body: bytes, headers=None) -> str:
+    """识别响应体的编码"""
+    return (
+            bom_encoding(body)
+            or (header_encoding(headers) if headers is not None else None)
+            or meta_encoding(body)
+            or guess_encoding(body)
+    )
@@ -16,3 +16,7 @@ class RequestMethodError(SpiderError):
 
 class MaxRetryError(SpiderError):
     pass
+
+
+class ResponseTooLargeError(SpiderError):
+    """响应体超过了 max_body_size（不会重试）"""
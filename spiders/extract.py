@@ -0,0 +1,95 @@
+import threading
+from functools import lru_cache
+
+from lxml import etree
+from parsel import Selector
+from parsel.csstranslator import HTMLTranslator
+
+_namespaces = dict(Selector._default_namespaces)  # 与 parsel 一致：re、set
+_translator = HTMLTranslator()
+_local = threading.local()
+_MAX_CACHED = 4096
+
+
+@lru_cache(maxsize=_MAX_CACHED)
+def _to_xpath(query: str) -> tuple[str, tuple]:
+    """转换为 XPath，并找出用到的命名空间（只注册用到的，与 parsel 一致）"""
+    if query.startswith("css:"):
+        query = _translator.css_to_xpath(query[4:])
+    return query, tuple((prefix, uri) for prefix, uri in _namespaces.items() if prefix + ":" in query)
+
+
+def compile_query(query: str) -> etree.XPath:
+    """
+    编译查询语句（线程级缓存，同一个线程中同一个语句只编译一次）
+    - 以 css: 开头的是 CSS 选择器（支持 ::text、::attr(name)），其余都当作 XPath
+    - lxml 的 XPath 对象执行时持有自己的锁，多个线程共用一个会互相等待，所以每个线程各自缓存
+    """
+    cache = getattr(_local, "cache", None)
+    if cache is None:
+        cache = _local.cache = {}
+    evaluator = cache.get(query)
+    if evaluator is None:
+        if len(cache) >= _MAX_CACHED:
+            cache.clear()
+        xpath, namespaces = _to_xpath(query)
+        evaluator = cache[query] = etree.XPath(xpath, namespaces=dict(namespaces), smart_strings=False)
+    return evaluator
+
+
+def to_text(node, method="html") -> str:
+    """把 XPath 的结果序列化为字符串（与 parsel 的 get 保持一致），XML 文档的 method 为 xml"""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, etree._Element):
+        return etree.tostring(node, method=method, encoding="unicode", with_tail=False)
+    if node is True:
+        return "1"
+    if node is False:
+        return "0"
+    return str(node)
+
+
+def query_all(node, query: str) -> list:
+    """执行查询，返回结果列表"""
+    result = compile_query(query)(node)
+    return result if isinstance(result, list) else [result]
+
+
+def extract(node, schema: dict, default=None, strip=True, method="html") -> dict:
+    """
+    按照 schema 一次性提取出整个 item
+
+    schema 的写法：
+        - "字段": "query"                 取第一个值，相当于 get_one
+        - "字段": ["query"]               取所有值，相当于 get_all
+        - "字段": ("query", {子schema})    每个匹配到的节点按子schema提取，得到 list[dict]
+        - "字段": {子schema}               在当前节点上按子schema提取，得到 dict
+
+    Args:
+        node: lxml 的节点（通常是 selector.root）
+        schema: 字段 => 查询语句
+        default: 取不到值时的默认值
+        strip: 是否去除首尾空白
+        method: 节点的序列化方式，XML 文档为 xml
+    """
+    item = {}
+    for field, rule in schema.items():
+        if isinstance(rule, str):
+            values = query_all(node, rule)
+            if values:
+                v = to_text(values[0], method)
+                item[field] = v.strip() if strip else v
+            else:
+                item[field] = default
+        elif isinstance(rule, list):
+            vs = [to_text(v, method) for v in query_all(node, rule[0])]
+            item[field] = [v.strip() for v in vs] if strip else vs
+        elif isinstance(rule, tuple):
+            query, sub_schema = rule
+            item[field] = [extract(sub, sub_schema, default, strip, method) for sub in query_all(node, query)]
+        elif isinstance(rule, dict):
+            item[field] = extract(node, rule, default, strip, method)
+        else:
+            raise ValueError("不支持的规则 {!r} => {}".format(field, rule))
+    return item
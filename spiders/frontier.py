@@ -0,0 +1,167 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Iterable
+from urllib.parse import urlsplit
+
+from wauo.spiders.dedup import request_fingerprint
+
+TODO, DOING, DONE, FAILED = 0, 1, 2, 3
+
+
+class Frontier:
+    """
+    待爬队列（基于 SQLite，线程安全，可断点续爬）
+    - 按域名分队列，同一个域名两次出队之间至少间隔 delay 秒（delays 可以为单个域名单独设置）
+    - 同一个域名内按 priority 从大到小出队，priority 相同时先进先出；不同域名之间按可出队的先后轮流
+    - 入队时按请求指纹去重，已经入过队的请求不会重复入队
+    - 数据都在磁盘上，内存占用与队列长度无关；重新打开同一个文件时，上次未完成的请求会重新入队
+
+    Args:
+        path: 数据库文件
+        delay: 同一个域名的请求间隔（秒）
+        delays: 单独设置某些域名的请求间隔，例如 {"slow.com": 5}
+        max_retries: 请求失败后最多重新入队几次
+        commit_every: 每写多少次提交一次（进程崩溃时最多丢失这么多条状态，丢失的请求会被重新请求）
+    """
+
+    def __init__(self, path: str, delay: float = 0, delays: dict = None, max_retries=2, commit_every=1000):
+        self.path = path
+        self.delay = delay
+        self.delays = delays or {}
+        self.max_retries = max_retries
+        self.commit_every = commit_every
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS requests (
+                fp TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                payload TEXT NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                retries INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_requests_queue ON requests (host, state, priority DESC);
+            CREATE TABLE IF NOT EXISTS hosts (
+                host TEXT PRIMARY KEY,
+                next_at REAL NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_hosts_next_at ON hosts (next_at);
+            """
+        )
+        self.conn.execute("UPDATE requests SET state = ? WHERE state = ?", (TODO, DOING))
+        self.conn.execute("INSERT OR IGNORE INTO hosts (host) SELECT DISTINCT host FROM requests WHERE state = ?", (TODO,))
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _wrote(self, n=1):
+        self.writes += n
+        if self.writes >= self.commit_every:
+            self.conn.commit()
+            self.writes = 0
+
+    @staticmethod
+    def _parse(req: str | dict) -> tuple[str, str]:
+        """返回 (请求指纹, 域名)"""
+        if isinstance(req, str):
+            return request_fingerprint(req), urlsplit(req).hostname or ""
+        method = "GET" if req.get("data") is None and req.get("json") is None else "POST"
+        body = req.get("data") if req.get("json") is None else req["json"]
+        return request_fingerprint(req["url"], method, body, req.get("params")), urlsplit(req["url"]).hostname or ""
+
+    def push(self, req: str | dict, priority=0) -> bool:
+        """入队，请求可以是 url 或者 go 的参数字典，返回是否入队成功（重复的请求返回 False）"""
+        fp, host = self._parse(req)
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO requests (fp, host, priority, payload) VALUES (?, ?, ?, ?)",
+                (fp, host, priority, json.dumps(req, ensure_ascii=False)),
+            )
+            if cur.rowcount:
+                self.conn.execute("INSERT OR IGNORE INTO hosts (host) VALUES (?)", (host,))
+            self._wrote()
+            return cur.rowcount > 0
+
+    def push_many(self, reqs: Iterable[str | dict], priority=0) -> int:
+        """批量入队，返回入队成功的数量"""
+        return sum(self.push(req, priority) for req in reqs)
+
+    def pop(self) -> tuple[str, str | dict] | None:
+        """出队一个可以请求的请求，返回 (请求指纹, 请求)；暂时没有可以请求的请求时返回 None"""
+        with self.lock:
+            now = time.time()
+            while True:
+                row = self.conn.execute(
+                    "SELECT host FROM hosts WHERE next_at <= ? ORDER BY next_at LIMIT 1", (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+                host = row[0]
+                item = self.conn.execute(
+                    "SELECT fp, payload FROM requests WHERE host = ? AND state = ? ORDER BY priority DESC, rowid LIMIT 1",
+                    (host, TODO),
+                ).fetchone()
+                if item is None:
+                    self.conn.execute("DELETE FROM hosts WHERE host = ?", (host,))
+                    continue
+                fp, payload = item
+                self.conn.execute("UPDATE requests SET state = ? WHERE fp = ?", (DOING, fp))
+                self.conn.execute(
+                    "UPDATE hosts SET next_at = ? WHERE host = ?", (now + self.delays.get(host, self.delay), host)
+                )
+                self._wrote()
+                return fp, json.loads(payload)
+
+    def next_ready_in(self) -> float | None:
+        """距离下一个请求可以出队还有多少秒，队列为空时返回 None"""
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(next_at) FROM hosts").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def done(self, fp: str):
+        """标记请求完成"""
+        with self.lock:
+            self.conn.execute("UPDATE requests SET state = ? WHERE fp = ?", (DONE, fp))
+            self._wrote()
+
+    def failed(self, fp: str):
+        """标记请求失败，重试次数未用完时重新入队"""
+        with self.lock:
+            row = self.conn.execute("SELECT host, retries FROM requests WHERE fp = ?", (fp,)).fetchone()
+            if row is None:
+                return
+            host, retries = row
+            if retries < self.max_retries:
+                self.conn.execute("UPDATE requests SET state = ?, retries = retries + 1 WHERE fp = ?", (TODO, fp))
+                self.conn.execute("INSERT OR IGNORE INTO hosts (host) VALUES (?)", (host,))
+            else:
+                self.conn.execute("UPDATE requests SET state = ? WHERE fp = ?", (FAILED, fp))
+            self._wrote()
+
+    def stats(self) -> dict:
+        """各个状态的请求数量"""
+        names = {TODO: "todo", DOING: "doing", DONE: "done", FAILED: "failed"}
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM requests GROUP BY state").fetchall()
+        return {name: 0 for name in names.values()} | {names[state]: n for state, n in rows}
+
+    def checkpoint(self):
+        """提交所有改动到磁盘"""
+        with self.lock:
+            self.conn.commit()
+            self.writes = 0
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
@@ -0,0 +1,89 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    """
+    令牌桶限速器（线程安全，同时支持 asyncio）
+    - 每个 key（默认为域名）一个令牌桶，互不影响
+    - rate: 每秒产生多少个令牌，为 None 时不限速
+    - burst: 令牌桶容量，即允许的瞬时并发请求数
+    - rules: 为指定 key 单独设置 (rate, burst)，例如 {"slow.com": (0.5, 1), "fast.com": (None, 1)}
+    - 令牌桶超过 max_buckets 个时，清理已经装满的桶（装满的桶与新建的桶等价），内存占用不随域名数量无限增长
+    """
+
+    def __init__(self, rate: float = None, burst=1, rules: dict[str, tuple[float | None, int]] = None,
+                 max_buckets=1024):
+        self.rate = rate
+        self.burst = burst
+        self.rules = rules or {}
+        self.buckets: dict[str, list[float]] = {}
+        self.max_buckets = max_buckets
+        self.sweep_at = max_buckets  # 桶的数量超过它时清理一次
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key_of(url: str) -> str:
+        """url 对应的 key（域名）"""
+        return urlparse(url).hostname or ""
+
+    def set_rule(self, key: str, rate: float | None, burst=1):
+        """设置某个 key 的速率"""
+        with self.lock:
+            self.rules[key] = (rate, burst)
+            self.buckets.pop(key, None)
+
+    def _refill(self, key: str, now: float) -> tuple[list[float], float, int]:
+        rate, burst = self.rules.get(key, (self.rate, self.burst))
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.sweep_at:
+                self._sweep(now)
+            bucket = self.buckets[key] = [burst, now]
+        elif rate:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket, rate, burst
+
+    def _sweep(self, now: float):
+        """删除已经装满的桶；清理后仍然很多时，下次等数量翻倍再清理，均摊开销不变"""
+        for key, (tokens, last) in list(self.buckets.items()):
+            rate, burst = self.rules.get(key, (self.rate, self.burst))
+            if not rate or tokens + (now - last) * rate >= burst:
+                del self.buckets[key]
+        self.sweep_at = max(self.max_buckets, len(self.buckets) * 2)
+
+    def reserve(self, key: str) -> float:
+        """预约一个令牌，返回需要等待的秒数（0 表示可以立刻请求）"""
+        with self.lock:
+            bucket, rate, _ = self._refill(key, time.monotonic())
+            if not rate:
+                return 0.0
+            bucket[0] -= 1
+            return 0.0 if bucket[0] >= 0 else -bucket[0] / rate
+
+    def try_acquire(self, key: str) -> float:
+        """尝试获取一个令牌，成功返回 0，失败不消耗令牌，返回还需等待的秒数"""
+        with self.lock:
+            bucket, rate, _ = self._refill(key, time.monotonic())
+            if not rate:
+                return 0.0
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def acquire(self, key: str):
+        """获取一个令牌，必要时阻塞当前线程（只等待这个 key 自己的配额）"""
+        delay = self.reserve(key)
+        if delay:
+            time.sleep(delay)
+
+    async def async_acquire(self, key: str):
+        """获取一个令牌（异步版本，等待时不阻塞事件循环）"""
+        import asyncio
+
+        delay = self.reserve(key)
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,121 @@
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+from loguru import logger
+
+from wauo.utils.stats import BUCKETS, Histogram
+
+
+class Metrics:
+    """
+    请求指标收集器（线程安全），作为钩子挂到爬虫上：spider.add_hook(metrics)
+    - 按 域名 + 状态码 统计请求数，按 域名 + 异常类型 统计失败数
+    - 按域名统计总耗时、首字节耗时、下载耗时、解析耗时的直方图（异步爬虫还有 DNS 解析、建立连接耗时）
+    - to_prometheus 输出 Prometheus 文本格式，summary 输出便于阅读的汇总
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.start = time.time()
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)  # (host, status) => 次数
+        self.errors = defaultdict(int)  # (host, error) => 次数
+        self.cache_hits = defaultdict(int)  # host => 次数
+        self.histograms = defaultdict(lambda: Histogram(self.buckets))  # (name, host) => Histogram
+
+    def __call__(self, event: dict):
+        self.observe(event)
+
+    def observe(self, event: dict):
+        """处理一个事件"""
+        host = event.get("host", "")
+        timings = event.get("timings", {})
+        with self.lock:
+            if event["type"] == "parse":
+                self.histograms["parse", host].observe(timings["parse"])
+                return
+            if event.get("error") is not None:
+                self.errors[host, type(event["error"]).__name__] += 1
+                return
+            self.requests[host, event["status"]] += 1
+            if event.get("from_cache"):
+                self.cache_hits[host] += 1
+            for name in ("total", "ttfb", "download", "dns", "connect"):
+                if name in timings:
+                    self.histograms[name, host].observe(timings[name])
+
+    def to_prometheus(self, prefix="wauo") -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        with self.lock:
+            lines.append(f"# TYPE {prefix}_requests_total counter")
+            for (host, status), n in sorted(self.requests.items()):
+                lines.append(f'{prefix}_requests_total{{host="{host}",status="{status}"}} {n}')
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for (host, error), n in sorted(self.errors.items()):
+                lines.append(f'{prefix}_errors_total{{host="{host}",error="{error}"}} {n}')
+            lines.append(f"# TYPE {prefix}_cache_hits_total counter")
+            for host, n in sorted(self.cache_hits.items()):
+                lines.append(f'{prefix}_cache_hits_total{{host="{host}"}} {n}')
+            names = sorted({name for name, _ in self.histograms})
+            for name in names:
+                metric = f"{prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (n, host), h in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else bound
+                        lines.append(f'{metric}_bucket{{host="{host}",le="{le}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{host="{host}"}} {h.sum}')
+                    lines.append(f'{metric}_count{{host="{host}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix="wauo"):
+        """写入 Prometheus textfile（先写临时文件再替换，避免读到一半的文件）"""
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="UTF-8") as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(temp, path)
+
+    def summary(self) -> str:
+        """按域名汇总：请求数、失败数、每秒请求数、耗时分位数"""
+        cost = max(time.time() - self.start, 1e-9)
+        with self.lock:
+            hosts = sorted({h for h, _ in self.requests} | {h for h, _ in self.errors})
+            lines = []
+            for host in hosts:
+                ok = sum(n for (h, _), n in self.requests.items() if h == host)
+                failed = sum(n for (h, _), n in self.errors.items() if h == host)
+                total = self.histograms.get(("total", host)) or Histogram(self.buckets)
+                parse = self.histograms.get(("parse", host)) or Histogram(self.buckets)
+                status = ", ".join(f"{s}:{n}" for (h, s), n in sorted(self.requests.items()) if h == host)
+                lines.append(
+                    f"{host} | 请求 {ok} 失败 {failed} 缓存 {self.cache_hits.get(host, 0)} | {ok / cost:.2f}/s"
+                    f" | 耗时 p50<={total.quantile(0.5)}s p99<={total.quantile(0.99)}s"
+                    f" | 解析 p50<={parse.quantile(0.5)}s | {status}"
+                )
+        return "\n".join(lines)
+
+    def start_reporter(self, interval=60, path: str = None):
+        """后台线程，每隔 interval 秒输出一次汇总日志，给出了 path 时同时写入 Prometheus textfile"""
+
+        def report():
+            while True:
+                time.sleep(interval)
+                try:
+                    logger.info("爬虫指标\n{}".format(self.summary()))
+                    if path:
+                        self.write_prometheus(path)
+                except Exception as e:
+                    logger.error("指标输出失败 | {}".format(e))
+
+        t = threading.Thread(target=report)
+        t.daemon = True
+        t.start()
+        return t
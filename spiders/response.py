@@ -1,18 +1,113 @@
+import time
 from typing import Callable
 
+from lxml import etree
 from parsel import Selector
 from requests import Response
+from requests.exceptions import JSONDecodeError
+from requests.utils import guess_json_utf
 
+from wauo.spiders import extract as _extract
+from wauo.spiders import fastjson
+from wauo.spiders.encoding import detect_encoding
 from wauo.spiders.errors import ResponseCodeError, ResponseTextError
 
 
 class SelectorResponse(Response):
     """可以使用Xpath、CSS"""
 
-    def __init__(self, response: Response):
+    def __init__(self, response: Response, slim=False, cache_text=False):
+        """
+        Args:
+            slim: 精简模式，见 make_slim
+            cache_text: 是否缓存解码后的 text（多次使用 text 时开启，否则每次都重新解码）
+        """
         super().__init__()
         self.__dict__.update(response.__dict__)
-        self.selector = Selector(text=response.text)
+        self._selector = None
+        self._text_cache = None  # (编码, 文本)
+        self._declared_encoding = self.encoding  # 与之不同说明调用方手动设置了 encoding
+        self._detected_encoding = None
+        self.cache_text = cache_text
+        self.timings = {}  # 各阶段耗时（秒）：wait、ttfb、download、total，解析后还有 parse
+        self.on_parse: Callable[["SelectorResponse"], None] | None = None
+        self.is_slim = False
+        self.body_dropped = False  # 精简模式下解析后丢弃了响应体
+        if slim:
+            self.make_slim()
+
+    def make_slim(self) -> "SelectorResponse":
+        """
+        精简模式：只保留状态码、响应头、url，以及 响应体 或者 解析树 二者之一
+        - 立即丢弃 raw、request、history 等引用
+        - 解析 HTML 之后丢弃响应体（之后 content 为 None，text / json / pick 抛出 ValueError），提取完成后可以调用 release 释放解析树
+        """
+        self.is_slim = True
+        self.raw = None
+        self.request = None
+        self.history = []
+        self.__dict__.pop("connection", None)
+        if self._selector is not None:
+            self._drop_body()
+        return self
+
+    def _drop_body(self):
+        self._content = None
+        self._text_cache = None
+        self.body_dropped = True
+
+    def _check_body(self):
+        if self.body_dropped:
+            raise ValueError("精简模式下响应体已在解析后丢弃")
+
+    def release(self):
+        """释放解析树（精简模式下响应体在解析后已经丢弃，release 之后只剩状态码、响应头、url）"""
+        self._selector = None
+
+    @property
+    def selector(self) -> Selector:
+        """首次使用时才解析HTML，之后复用（JSON、图片等响应不会产生解析开销）"""
+        if self._selector is None:
+            if self.body_dropped:
+                raise ValueError("精简模式下解析树已释放，响应体也已丢弃")
+            start = time.perf_counter()
+            if self.content:
+                # 直接把 bytes 交给 lxml，不需要先解码成 text 再编码回去
+                self._selector = Selector(body=self.content, encoding=self.best_encoding())
+            else:
+                self._selector = Selector(text="")
+            self.timings["parse"] = time.perf_counter() - start
+            if self.is_slim:
+                self._drop_body()
+            if self.on_parse is not None:
+                self.on_parse(self)
+        return self._selector
+
+    def best_encoding(self) -> str:
+        """
+        响应体的编码：手动设置过 encoding 时使用它，否则按 BOM、响应头、meta、快速兜底的顺序识别一次
+        （不使用 requests 的 apparent_encoding，大页面上非常慢）
+        """
+        if self.encoding and self.encoding != self._declared_encoding:
+            return self.encoding
+        if self._detected_encoding is None:
+            self._detected_encoding = detect_encoding(self.content or b"", self.headers)
+            self.encoding = self._declared_encoding = self._detected_encoding
+        return self._detected_encoding
+
+    @property
+    def text(self) -> str:
+        """解码后的文本（只解码一次，cache_text 为 True 时缓存）"""
+        self._check_body()
+        if not self.content:
+            return ""
+        encoding = self.best_encoding()
+        if self._text_cache is not None and self._text_cache[0] == encoding:
+            return self._text_cache[1]
+        text = self.content.decode(encoding, errors="replace")
+        if self.cache_text:
+            self._text_cache = (encoding, text)
+        return text
 
     def __str__(self):
         return "<Response {}>".format(self.status_code)
@@ -25,13 +120,68 @@ class SelectorResponse(Response):
         sel = self.selector.css(query)
         return sel
 
+    @property
+    def _method(self) -> str:
+        """节点的序列化方式"""
+        return "xml" if self.selector.type == "xml" else "html"
+
     def get_one(self, query: str, default=None, strip=True):
-        v = self.selector.xpath(query).get(default=default)
+        root = self.selector.root
+        if isinstance(root, etree._Element):
+            values = _extract.query_all(root, query)
+            v = _extract.to_text(values[0], self._method) if values else default
+        else:
+            v = self.selector.xpath(query).get(default=default)
         return v.strip() if strip and isinstance(v, str) else v
 
     def get_all(self, query: str, strip=True):
-        vs = [v.strip() if strip else v for v in self.selector.xpath(query).getall()]
-        return vs
+        root = self.selector.root
+        if isinstance(root, etree._Element):
+            vs = [_extract.to_text(v, self._method) for v in _extract.query_all(root, query)]
+        else:
+            vs = self.selector.xpath(query).getall()
+        return [v.strip() for v in vs] if strip else vs
+
+    def json(self, **kwargs):
+        """
+        解析 JSON（安装了 orjson / ujson 时使用它们，直接解析 bytes，不先解码成文本）
+        - 传递了 kwargs（例如 object_hook）时，与 requests 的行为一致
+        """
+        self._check_body()
+        if kwargs or fastjson.BACKEND == "json":
+            return super().json(**kwargs)
+        try:
+            return fastjson.loads(self._json_source())
+        except ValueError as e:
+            raise JSONDecodeError(getattr(e, "msg", str(e)), getattr(e, "doc", ""), getattr(e, "pos", 0))
+
+    def pick(self, path: str | list, default=None):
+        """按路径从 JSON 响应中取值，只解析命中的部分（适合很大的 JSON），路径规则见 fastjson.pick"""
+        return fastjson.pick(self._json_source(), path, default)
+
+    def _json_source(self) -> bytes | str:
+        """UTF-8（或者未声明编码、探测为 UTF-8）时直接返回 bytes，否则返回解码后的文本"""
+        self._check_body()
+        encoding = self.encoding or guess_json_utf(self.content) or "utf-8"
+        if encoding.lower().replace("_", "-") in ("utf-8", "utf8", "ascii", "us-ascii"):
+            return self.content
+        return self.content.decode(encoding, errors="replace")
+
+    def extract(self, schema: dict, default=None, strip=True) -> dict:
+        """
+        按照 schema 一次性提取出整个 item（查询语句会被编译并缓存）
+
+        Examples:
+            resp.extract({
+                "title": "//title/text()",
+                "links": ["//a/@href"],
+                "items": ("//li", {"name": "./a/text()", "url": "css:a::attr(href)"}),
+            })
+        """
+        root = self.selector.root
+        if not isinstance(root, etree._Element):
+            raise ValueError("extract 仅支持 HTML/XML 响应")
+        return _extract.extract(root, schema, default, strip, self._method)
 
     def raise_for_status(self, codes: list = None):
         codes = codes or [200]
@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable
+
+from loguru import logger
+from requests import Response
+
+from wauo.spiders.errors import ResponseTooLargeError
+
+
+class RetryPolicy:
+    """
+    重试策略（线程安全，多个爬虫可以共用一个）
+    - 指数退避 + 随机抖动：第 n 次重试前等待 random(0, min(max_backoff, backoff * 2 ** n)) 秒
+    - 响应状态码为 429 / 503 且带有 Retry-After 时，按照 Retry-After 等待（不超过 max_retry_after）
+    - 只对 statuses 中的状态码、exceptions 中的异常进行重试
+    - 重试预算：每个请求存入 budget 个令牌，每次重试消耗 1 个，令牌不足时不再重试，避免目标网站故障时重试风暴
+
+    Args:
+        max_retries: 最多重试次数
+        backoff: 退避的基础时间（秒）
+        max_backoff: 退避时间上限（秒）
+        jitter: 是否随机抖动，避免大量请求在同一时刻重试
+        statuses: 需要重试的状态码
+        exceptions: 需要重试的异常
+        max_retry_after: Retry-After 的上限（秒）
+        budget: 重试占请求的比例上限，例如 0.1 表示最多多出 10% 的请求
+        min_retries: 预算的初始值和上限，保证请求量很少时也能重试
+    """
+
+    def __init__(
+            self,
+            max_retries=3,
+            backoff=0.5,
+            max_backoff=30,
+            jitter=True,
+            statuses=(429, 500, 502, 503, 504),
+            exceptions: tuple[type[Exception], ...] = (Exception,),
+            max_retry_after=120,
+            budget=0.1,
+            min_retries=10,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = set(statuses)
+        self.exceptions = exceptions
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self.min_retries = min_retries
+        self.tokens = float(min_retries)
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        """新请求存入预算"""
+        with self.lock:
+            self.tokens = min(self.min_retries, self.tokens + self.budget)
+
+    def withdraw(self) -> bool:
+        """从预算中取出一次重试的机会，预算不足时返回 False"""
+        with self.lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+        logger.warning("重试预算已用完，放弃重试")
+        return False
+
+    def retry_after(self, response: Response) -> float | None:
+        """解析 Retry-After（秒数或者 HTTP 日期）"""
+        value = response.headers.get("Retry-After")
+        if not value or response.status_code not in (429, 503):
+            return None
+        if value.strip().isdigit():
+            seconds = float(value)
+        else:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(seconds, 0.0), self.max_retry_after)
+
+    def delay(self, attempt: int, response: Response = None) -> float:
+        """第 attempt 次重试前需要等待的秒数（attempt 从 0 开始）"""
+        if response is not None:
+            seconds = self.retry_after(response)
+            if seconds is not None:
+                return seconds
+        cap = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, cap) if self.jitter else cap
+
+    def should_retry(self, attempt: int, response: Response = None, error: Exception = None) -> bool:
+        """是否需要重试（需要时会消耗一次预算）"""
+        if attempt >= self.max_retries:
+            return False
+        if error is not None:
+            if isinstance(error, ResponseTooLargeError):
+                return False
+            return isinstance(error, self.exceptions) and self.withdraw()
+        return response is not None and response.status_code in self.statuses and self.withdraw()
+
+    def run(self, call: Callable[[], Response], url: str) -> Response:
+        """按照重试策略执行请求，重试全部失败时抛出最后一次的异常，或者返回最后一次的响应"""
+        self.deposit()
+        for i in range(self.max_retries + 1):
+            try:
+                response = call()
+            except Exception as e:
+                if not self.should_retry(i, error=e):
+                    raise
+                seconds = self.delay(i)
+                self.log(url, i, seconds, "{} => {}".format(e, type(e)))
+            else:
+                if not self.should_retry(i, response=response):
+                    return response
+                seconds = self.delay(i, response)
+                self.log(url, i, seconds, "status {}".format(response.status_code))
+            time.sleep(seconds)
+
+    async def arun(self, call: Callable[[], Awaitable[Response]], url: str) -> Response:
+        """run 的异步版本"""
+        import asyncio
+
+        self.deposit()
+        for i in range(self.max_retries + 1):
+            try:
+                response = await call()
+            except Exception as e:
+                if not self.should_retry(i, error=e):
+                    raise
+                seconds = self.delay(i)
+                self.log(url, i, seconds, "{} => {}".format(e, type(e)))
+            else:
+                if not self.should_retry(i, response=response):
+                    return response
+                seconds = self.delay(i, response)
+                self.log(url, i, seconds, "status {}".format(response.status_code))
+            await asyncio.sleep(seconds)
+
+    def log(self, url: str, attempt: int, seconds: float, reason: str):
+        logger.error(
+            f"""
+            url             {url}
+            error           {reason}
+            retry_times     {attempt + 1}/{self.max_retries}
+            retry_after     {seconds:.2f}s
+            """
+        )
@@ -0,0 +1,269 @@
+import itertools
+import json
+import multiprocessing
+import queue
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator
+
+from loguru import logger
+
+OK, FAILED, SKIPPED = "ok", "failed", "skipped"
+
+
+def read_jsonl(path: str) -> Iterator[str | dict]:
+    """逐行读取请求：每行是一个 go 的参数字典（JSON），或者一个 url"""
+    with open(path, encoding="UTF-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield json.loads(line) if line.startswith("{") else line
+
+
+def _work(gen: int, tasks, results, parse, spider_factory, spider_kwargs: dict, concurrency: int, go_kwargs: dict):
+    """工作进程：用 fetch_many 并发请求，在本进程中解析，把结果（带上进程的代号 gen）通过管道 results 发回主进程"""
+    if spider_factory is not None:
+        spider = spider_factory()
+    else:
+        from wauo.spiders.spiders import WauoSpider
+
+        spider = WauoSpider(**spider_kwargs)
+    owners = {}  # id(请求参数) => (编号, 原始请求, 请求参数)，保留请求参数的引用，保证 id 不会被复用
+    stop = False
+
+    def feed(chunk):
+        nonlocal stop
+        while True:
+            for rid, req in chunk:
+                obj = {"url": req} if isinstance(req, str) else dict(req)
+                owners[id(obj)] = (rid, req, obj)
+                yield obj
+            try:
+                chunk = tasks.get_nowait()  # 不阻塞地接着处理已经分配过来的请求，避免每批末尾并发下降
+            except queue.Empty:
+                return
+            if chunk is None:
+                stop = True
+                return
+
+    while not stop:
+        chunk = tasks.get()
+        if chunk is None:
+            break
+        for obj, result in spider.fetch_many(feed(chunk), concurrency, **go_kwargs):
+            rid, req, _ = owners.pop(id(obj))
+            if result is None or isinstance(result, Exception):
+                results.send((gen, rid, FAILED, [], repr(result)))
+                continue
+            try:
+                items = parse(req, result)
+                items = [] if items is None else [items] if isinstance(items, dict) else list(items)
+            except Exception as e:
+                results.send((gen, rid, FAILED, [], "parse => {!r}".format(e)))
+                continue
+            results.send((gen, rid, OK, items, None))
+        for rid, req, _ in owners.values():  # 被去重过滤器跳过的请求
+            results.send((gen, rid, SKIPPED, [], None))
+        owners.clear()
+    spider.close()
+    results.close()
+
+
+class _Worker:
+    """一个工作进程：各自的任务队列和结果管道，重启时全部换新，旧进程残留的结果不会混进来"""
+
+    def __init__(self, wid: int, gen: int, ctx, target, args: tuple):
+        self.wid = wid
+        self.gen = gen  # 进程代号，每次启动都不同，用于丢弃旧进程的结果
+        self.tasks = ctx.Queue()
+        self.results, writer = ctx.Pipe(duplex=False)
+        self.assigned: dict[int, Any] = {}  # 已经分配给该进程、还没有返回结果的请求
+        self.process = ctx.Process(target=target, args=(gen, self.tasks, writer, *args), name="CrawlWorker-{}".format(wid))
+        self.process.daemon = True
+        self.process.start()
+        writer.close()  # 写端只留在子进程中，子进程退出后读端会读到 EOF
+
+    def receive(self, limit: int) -> list[tuple]:
+        """读取已经到达的结果（最多 limit 个），丢弃其他代号的结果"""
+        got = []
+        try:
+            while len(got) < limit and self.results.poll():
+                msg = self.results.recv()
+                if msg[0] == self.gen:
+                    got.append(msg)
+        except (EOFError, OSError):  # 进程已经退出（或者在发送中途崩溃）
+            pass
+        return got
+
+    def close(self):
+        """释放任务队列（及其后台线程）、结果管道和进程对象，进程需要已经退出"""
+        self.tasks.close()
+        self.tasks.cancel_join_thread()  # 进程已经退出，队列中没有送出的任务直接丢弃
+        self.results.close()
+        self.process.join(1)
+        if self.process.exitcode is not None:
+            self.process.close()
+
+
+class CrawlRunner:
+    """
+    多进程爬取（解析 HTML 是 CPU 密集型的，单进程受 GIL 限制只能用到一个核）
+    - 请求来源可以是 JSONL 文件或者任意可迭代对象，按批分配给 processes 个工作进程
+    - 每个工作进程有自己的 WauoSpider，用 fetch_many 以 concurrency 个线程并发请求，并在本进程中调用 parse 解析
+    - 解析出的数据流式发回主进程：iter_items 逐个返回，或者 run 交给 sink（例如 ItemPipeline.put）
+    - 工作进程崩溃时，分配给它且还没有返回结果的请求重新分配，并启动新的进程；
+      同一个请求导致 max_crashes 次崩溃时放弃该请求
+    - 每隔 progress_interval 秒输出一次汇总进度
+
+    Args:
+        parse: 解析函数 parse(请求, 响应)，返回 dict、dict 的列表或者 None（多进程下必须是模块级的函数）
+        processes: 工作进程数，默认为 CPU 核数
+        concurrency: 每个工作进程的并发数
+        chunk_size: 每次分配给工作进程的请求数，默认为 concurrency * 2
+        spider_kwargs: 工作进程中创建 WauoSpider 的参数
+        spider_factory: 工作进程中创建爬虫的函数（需要限速器、代理池等不能跨进程传递的对象时使用）
+        go_kwargs: 所有请求共用的 go 参数
+        max_restarts: 最多重启多少次工作进程
+        max_crashes: 单个请求最多经历几次工作进程崩溃
+    """
+
+    def __init__(
+            self,
+            parse: Callable[[Any, Any], Any],
+            processes: int = None,
+            concurrency=16,
+            chunk_size: int = None,
+            spider_kwargs: dict = None,
+            spider_factory: Callable[[], Any] = None,
+            go_kwargs: dict = None,
+            max_restarts=10,
+            max_crashes=2,
+            progress_interval=10,
+    ):
+        self.parse = parse
+        self.processes = processes or multiprocessing.cpu_count()
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size or concurrency * 2
+        self.spider_kwargs = spider_kwargs or {}
+        self.spider_factory = spider_factory
+        self.go_kwargs = go_kwargs or {}
+        self.max_restarts = max_restarts
+        self.max_crashes = max_crashes
+        self.progress_interval = progress_interval
+        self.ctx = multiprocessing.get_context("spawn")  # fork 会复制父进程中的锁（例如日志），可能死锁
+        self.counts = {OK: 0, FAILED: 0, SKIPPED: 0, "items": 0, "restarts": 0}
+        self.started_at = 0.0
+        self.generations = itertools.count()
+
+    def _start(self, wid: int) -> _Worker:
+        args = (self.parse, self.spider_factory, self.spider_kwargs, self.concurrency, self.go_kwargs)
+        return _Worker(wid, next(self.generations), self.ctx, _work, args)
+
+    def iter_items(self, source: str | Iterable[str | dict]) -> Iterator[Any]:
+        """运行并逐个返回解析出的数据"""
+        reqs = enumerate(read_jsonl(source) if isinstance(source, str) else source)
+        retry = deque()  # 需要重新分配的请求 (编号, 请求)
+        crashes: dict[int, int] = {}
+        workers = [self._start(wid) for wid in range(self.processes)]
+        exhausted = False
+        self.counts = dict.fromkeys(self.counts, 0)
+        self.started_at = last_report = time.time()
+
+        def next_chunk(n: int) -> list:
+            nonlocal exhausted
+            chunk = []
+            while retry and len(chunk) < n:
+                chunk.append(retry.popleft())
+            while not exhausted and len(chunk) < n:
+                item = next(reqs, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    chunk.append(item)
+            return chunk
+
+        try:
+            while True:
+                for w in workers:
+                    if len(w.assigned) < self.chunk_size * 2:  # 保持每个进程手里有两批，避免空等
+                        chunk = next_chunk(self.chunk_size)
+                        if chunk:
+                            w.assigned.update(chunk)
+                            w.tasks.put(chunk)
+                if exhausted and not retry and not any(w.assigned for w in workers):
+                    break
+
+                ready = set(wait([w.results for w in workers], timeout=0.5))
+                for i, w in enumerate(workers):
+                    alive = w.process.is_alive()
+                    if w.results in ready or not alive:
+                        # 进程退出前发出的结果仍然有效，先读完，再重新分配剩下的请求
+                        for _, rid, status, items, error in w.receive(self.chunk_size if alive else float("inf")):
+                            req = w.assigned.pop(rid, None)
+                            if req is None:
+                                continue
+                            self.counts[status] += 1
+                            if status == FAILED:
+                                logger.error("请求失败 | {} | {}".format(req, error))
+                            self.counts["items"] += len(items)
+                            yield from items
+                    if not alive:
+                        self._recover(w, retry, crashes)
+                        workers[i] = self._start(w.wid)
+
+                if time.time() - last_report >= self.progress_interval:
+                    last_report = time.time()
+                    self.report(workers)
+        finally:
+            for w in workers:
+                if w.process.is_alive():
+                    w.tasks.put(None)
+            for w in workers:
+                w.process.join(5)
+                if w.process.is_alive():
+                    w.process.terminate()
+            self.report(workers)
+            for w in workers:
+                w.close()
+
+    def _recover(self, w: _Worker, retry: deque, crashes: dict):
+        """工作进程意外退出：重新分配它手里的请求"""
+        self.counts["restarts"] += 1
+        if self.counts["restarts"] > self.max_restarts:
+            raise RuntimeError("工作进程重启次数超过 {}".format(self.max_restarts))
+        logger.warning("工作进程 {} 意外退出（exitcode={}），重新分配 {} 个请求".format(w.wid, w.process.exitcode, len(w.assigned)))
+        for rid, req in w.assigned.items():
+            crashes[rid] = crashes.get(rid, 0) + 1
+            if crashes[rid] >= self.max_crashes:
+                self.counts[FAILED] += 1
+                logger.error("请求多次导致工作进程崩溃，放弃 | {}".format(req))
+            else:
+                retry.append((rid, req))
+        w.assigned.clear()
+        w.close()
+
+    def run(self, source: str | Iterable[str | dict], sink: Callable[[Any], Any] = None) -> dict:
+        """运行到结束，解析出的数据交给 sink，返回统计"""
+        for item in self.iter_items(source):
+            if sink is not None:
+                sink(item)
+        return self.stats()
+
+    def stats(self) -> dict:
+        cost = max(time.time() - self.started_at, 1e-9)
+        finished = self.counts[OK] + self.counts[FAILED] + self.counts[SKIPPED]
+        return self.counts | {
+            "elapsed": round(cost, 2),
+            "requests_per_sec": round(finished / cost, 2),
+            "items_per_sec": round(self.counts["items"] / cost, 2),
+        }
+
+    def report(self, workers: list[_Worker]):
+        s = self.stats()
+        alive = sum(w.process.is_alive() for w in workers)
+        logger.info(
+            "进度 | 成功 {ok} 失败 {failed} 跳过 {skipped} | 数据 {items} | {requests_per_sec}/s | "
+            "进程 {alive}/{total} 重启 {restarts}".format(alive=alive, total=len(workers), **s)
+        )
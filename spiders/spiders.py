@@ -1,20 +1,34 @@
 import base64
 import hashlib
-import json
+import heapq
+import itertools
 import os
 import random
-import re
 import string
+import threading
 import time
 import uuid
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from functools import wraps
+from typing import Callable, Iterable, Iterator
+from urllib.parse import urlsplit
 
 import requests
 from loguru import logger
-
-from wauo.spiders.errors import MaxRetryError
+from requests.adapters import HTTPAdapter
+
+from wauo.spiders import fastjson
+from wauo.spiders.cache import HttpCache
+from wauo.spiders.dedup import HashSetFilter, ScalableBloomFilter, request_fingerprint
+from wauo.spiders.download import DownloadProgress, load_segments, prepare_file, save_segments, split_ranges
+from wauo.spiders.errors import MaxRetryError, ResponseCodeError, ResponseTooLargeError
+from wauo.spiders.frontier import Frontier
+from wauo.spiders.limiter import RateLimiter
+from wauo.spiders.proxy import ProxyPool
 from wauo.spiders.response import SelectorResponse
+from wauo.spiders.retry import RetryPolicy
 
 
 class SpiderTools:
@@ -33,12 +47,9 @@ class SpiderTools:
     """
 
     @staticmethod
-    def jsonp2json(jsonp: str) -> dict:
-        """jsonp转换为json"""
-        match = re.search(r".*?({.*}).*", jsonp, re.S)
-        if not match:
-            raise ValueError("Invalid JSONP format")
-        return json.loads(match.group(1))
+    def jsonp2json(jsonp: str | bytes) -> dict:
+        """jsonp转换为json（线性时间，支持 bytes，安装了 orjson 时使用 orjson 解析）"""
+        return fastjson.jsonp2json(jsonp)
 
     @staticmethod
     def get_uuid() -> str:
@@ -111,11 +122,18 @@ class SpiderTools:
 
 
 def retry(func):
-    """请求异常时重试2次"""
+    """请求异常时重试2次（爬虫设置了 retry_policy 时，按照重试策略重试）"""
 
     @wraps(func)
     def inner(*args, **kwargs):
         url = args[1]
+        policy = getattr(args[0], "retry_policy", None)
+        if policy is not None:
+            try:
+                return policy.run(lambda: func(*args, **kwargs), url)
+            except Exception as e:
+                logger.critical(f"Failed => {url} | {e}")
+                return None
         for i in range(3):
             try:
                 return func(*args, **kwargs)
@@ -127,11 +145,31 @@ def retry(func):
                     type        {type(e)}
                     """
                 )
+                if isinstance(e, ResponseTooLargeError):
+                    break
         logger.critical(f"Failed => {url}")
 
     return inner
 
 
+def _close_session(sessions: list, session: requests.Session):
+    session.close()
+    try:
+        sessions.remove(session)
+    except ValueError:
+        pass
+
+
+class _LocalSession:
+    """保存在线程局部变量中，线程退出（或者爬虫 close、被回收）时随之回收，同时关闭会话并从 sessions 中移除"""
+
+    __slots__ = ("session", "__weakref__")
+
+    def __init__(self, session: requests.Session, sessions: list):
+        self.session = session
+        weakref.finalize(self, _close_session, sessions, session)
+
+
 class BaseSpider(SpiderTools):
     def __init__(
             self,
@@ -141,7 +179,38 @@ class BaseSpider(SpiderTools):
             default_delay=0,
             default_timeout=5,
             ua_way="local",
+            pool_connections=10,
+            pool_maxsize=10,
+            pool_block=False,
+            keep_alive=True,
+            thread_local=False,
+            limiter: RateLimiter = None,
+            cache: HttpCache = None,
+            dupefilter: ScalableBloomFilter | HashSetFilter = None,
+            retry_policy: RetryPolicy = None,
+            proxy_pool: ProxyPool = None,
+            hooks: list[Callable[[dict], None]] = None,
+            slim=False,
+            max_body_size: int = None,
     ):
+        """
+        Args:
+            is_session: 是否保持会话（为 False 时以下连接池参数无效）
+            pool_connections: 缓存多少个域名的连接池（不是总连接数的上限，requests 没有这样的上限；
+                每个会话保持的连接最多为 pool_connections * pool_maxsize，thread_local 时每个线程各一个会话）
+            pool_maxsize: 每个域名最多保持多少个连接，多线程时建议不小于线程数
+            pool_block: 连接数达到 pool_maxsize 时是否阻塞等待（否则新建连接，用完丢弃）
+            keep_alive: 是否复用连接，为 False 时每个请求都带上 Connection: close
+            thread_local: 每个线程使用独立的会话（共享同一个 Cookie），避免多线程争抢同一个连接池；线程退出时关闭它的会话
+            limiter: 限速器，按域名限制请求速率（代替 default_delay 的固定睡眠）
+            cache: 响应缓存，命中时不再请求，过期后通过 ETag / Last-Modified 重新验证
+            dupefilter: 去重过滤器，send / go / fetch_many 会跳过已经请求过的请求
+            retry_policy: 重试策略（指数退避、Retry-After、重试预算），设置后 send / go 按照它重试
+            proxy_pool: 代理池，每次请求（包括重试）都从池中选择代理，并反馈请求结果
+            hooks: 钩子，每次请求结束、每次解析HTML后都会以事件字典调用（例如 Metrics）
+            slim: 返回精简模式的响应（解析HTML后丢弃响应体），大量持有响应时节省内存
+            max_body_size: 响应体的最大字节数（解压后），超过时中断读取并抛出 ResponseTooLargeError（不限制 download）
+        """
         assert ua_way in ["api", "local"]
         if ua_way == "api":
             from fake_useragent import UserAgent
@@ -152,16 +221,210 @@ class BaseSpider(SpiderTools):
 
             self.ua_local = make_ua
 
-        self.client = requests.Session() if is_session else requests
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.thread_local = thread_local and is_session
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self.sessions = []
+        self.local = threading.local()
+        self.client = self.new_session() if is_session and not self.thread_local else requests  # thread_local 模式下每个线程用到时才创建会话
 
         self.default_headers = default_headers or {}
         self.default_proxies = default_proxies or {}
         self.default_delay = default_delay
         self.default_timeout = default_timeout
+        self.limiter = limiter
+        self.cache = cache
+        self.dupefilter = dupefilter
+        self.retry_policy = retry_policy
+        self.proxy_pool = proxy_pool
+        self.hooks = list(hooks or [])
+        self.slim = slim
+        self.max_body_size = max_body_size
 
         self.is_raise_error = True  # 是否抛出异常（当请求异常时）
         self.is_merge_default_headers = True  # 是否合并默认请求头（当发送请求时）
 
+    @property
+    def client(self):
+        """发送请求的客户端（thread_local 模式下每个线程各有一个会话）"""
+        if not self.thread_local:
+            return self._client
+        local = getattr(self.local, "session", None)
+        if local is None:
+            local = self.local.session = _LocalSession(self.new_session(), self.sessions)
+        return local.session
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    def new_session(self) -> requests.Session:
+        """创建会话，按照连接池参数挂载适配器，所有会话共享同一个 Cookie"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.cookies = self.cookies
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        self.sessions.append(session)
+        return session
+
+    def close(self):
+        """关闭所有会话，释放连接"""
+        for session in list(self.sessions):
+            session.close()
+        self.sessions.clear()
+        self.local = threading.local()
+
+    @staticmethod
+    def fingerprint(url: str, params: dict = None, data=None, json=None) -> str:
+        """请求指纹（请求方法 + 规范化的 url + 请求体）"""
+        method = "GET" if data is None and json is None else "POST"
+        return request_fingerprint(url, method, data if json is None else json, params)
+
+    def seen(self, url: str, params: dict = None, data=None, json=None) -> tuple[str | None, bool]:
+        """查询去重过滤器，返回 (请求指纹, 是否已经请求过)，没有设置 dupefilter 时指纹为 None"""
+        if self.dupefilter is None:
+            return None, False
+        fp = self.fingerprint(url, params, data, json)
+        return fp, fp in self.dupefilter
+
+    def throttle(self, url: str):
+        """限速：等待 url 所在域名的令牌（fetch_many 已提前获取令牌的请求除外）"""
+        if self.limiter is None:
+            return
+        if getattr(self.local, "prepaid", False):
+            self.local.prepaid = False
+            return
+        self.limiter.acquire(self.limiter.key_of(url))
+
+    def add_hook(self, hook: Callable[[dict], None]):
+        """添加钩子"""
+        self.hooks.append(hook)
+
+    def emit(self, event: dict):
+        """把事件交给所有钩子（钩子异常只记录日志，不影响请求）"""
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.error("钩子执行失败 | {} => {}".format(e, type(e)))
+
+    def track(
+            self,
+            url: str,
+            method: str,
+            timings: dict,
+            response: SelectorResponse = None,
+            error: Exception = None,
+    ) -> SelectorResponse | None:
+        """
+        记录一次请求的耗时，并通知钩子（设置了 slim 时，同时把响应转为精简模式）
+        - type 为 request 的事件：url、host、method、status、error、timings、from_cache
+        - 响应首次解析HTML后，还会有一个 type 为 parse 的事件，timings 中只有 parse
+        """
+        if response is not None:
+            response.timings.update(timings)
+            if self.slim:
+                response.make_slim()
+        if not self.hooks:
+            return response
+        host = urlsplit(url).hostname or ""
+        if response is not None:
+            response.on_parse = lambda r: self.emit(
+                {"type": "parse", "url": url, "host": host, "timings": {"parse": r.timings["parse"]}}
+            )
+        self.emit(
+            {
+                "type": "request",
+                "url": url,
+                "host": host,
+                "method": method,
+                "status": None if response is None else response.status_code,
+                "error": error,
+                "timings": timings,
+                "from_cache": getattr(response, "from_cache", False),
+            }
+        )
+        return response
+
+    def request(
+            self,
+            url: str,
+            headers: dict,
+            params: dict = None,
+            data: dict | str = None,
+            json: dict = None,
+            proxies: dict = None,
+            timeout: float | int = None,
+            **kwargs,
+    ) -> SelectorResponse:
+        """发送一次请求（不重试），默认为GET请求，传递了data或者json参数则为POST请求"""
+        method = "GET" if data is None and json is None else "POST"
+        t0 = time.perf_counter()
+        if self.cache is not None:
+            key = self.cache.make_key(method, url, params, data if json is None else json)
+            entry, fresh = self.cache.lookup(key)
+            if fresh:
+                return self.track(url, method, {}, self.cache.to_response(entry))
+            if entry is not None:
+                headers = headers | self.cache.validators(entry)
+
+        self.throttle(url)
+        same = dict(headers=headers, params=params, proxies=proxies, timeout=timeout, **kwargs)
+        if self.max_body_size is not None:
+            same["stream"] = True
+        start = time.time()
+        begin = time.perf_counter()
+        try:
+            response = (
+                self.client.get(url, **same)
+                if method == "GET"
+                else self.client.post(url, data=data, json=json, **same)
+            )
+            if self.max_body_size is not None:
+                self.read_body(response)
+        except Exception as e:
+            self.report_proxy(proxies, start)
+            self.track(url, method, {"wait": begin - t0, "total": time.perf_counter() - t0}, error=e)
+            raise
+        end = time.perf_counter()
+        self.report_proxy(proxies, start, response.status_code)
+
+        # requests 的 elapsed 是从发出请求到解析完响应头的耗时（包含 DNS、建立连接、TLS 握手）
+        ttfb = response.elapsed.total_seconds()
+        timings = {"wait": begin - t0, "ttfb": ttfb, "download": max(0.0, end - begin - ttfb), "total": end - t0}
+        if self.cache is not None:
+            if response.status_code == 304 and entry is not None:
+                self.cache.refresh(key, entry, response)
+                return self.track(url, method, timings, self.cache.to_response(entry))
+            self.cache.save(key, response)
+        return self.track(url, method, timings, SelectorResponse(response))
+
+    def read_body(self, response: requests.Response):
+        """流式读取响应体，超过 max_body_size 时断开连接并抛出 ResponseTooLargeError"""
+        limit = self.max_body_size
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > limit:
+            response.close()
+            raise ResponseTooLargeError("Content-Length {} > {} => {}".format(length, limit, response.url))
+        chunks, size = [], 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > limit:
+                response.close()
+                raise ResponseTooLargeError("body > {} => {}".format(limit, response.url))
+            chunks.append(chunk)
+        response._content = b"".join(chunks)
+
     def get_headers(self) -> dict:
         """获取headers"""
         headers = {"User-Agent": self.get_ua()}
@@ -173,9 +436,18 @@ class BaseSpider(SpiderTools):
         return ua
 
     def get_proxies(self) -> dict:
-        """获取代理"""
+        """获取代理（设置了代理池时，从代理池中选择）"""
+        if self.proxy_pool is not None:
+            return self.proxy_pool.get()
         return self.default_proxies
 
+    def report_proxy(self, proxies: dict, start: float, status_code: int = None):
+        """把请求结果反馈给代理池（status_code 为 None 表示请求异常）"""
+        if self.proxy_pool is None:
+            return
+        ok = status_code is not None and status_code not in self.proxy_pool.bad_statuses
+        self.proxy_pool.report(proxies, ok, time.time() - start)
+
     @retry
     def send(
             self,
@@ -188,6 +460,7 @@ class BaseSpider(SpiderTools):
             timeout: float | int = None,
             cookie: str = None,
             delay: int | float = None,
+            dont_filter=False,
             **kwargs,
     ) -> SelectorResponse:
         """
@@ -198,13 +471,20 @@ class BaseSpider(SpiderTools):
         Args:
             cookie: 为headers补充Cookie字段
             delay: 延迟多少秒后才请求
+            dont_filter: 不经过去重过滤器（设置了 dupefilter 时，请求成功过的请求会直接返回 None）
             **kwargs: 跟requests的参数保持一致
 
         Returns:
             SelectorResponse（可以使用Xpath、CSS）
         """
+        fp, seen = (None, False) if dont_filter else self.seen(url, params, data, json)
+        if seen:
+            logger.debug("重复的请求 => {}".format(url))
+            return None
+
         delay = delay or self.default_delay
-        time.sleep(delay)
+        if delay:
+            time.sleep(delay)
 
         proxies = proxies or self.get_proxies()
         timeout = timeout or self.default_timeout
@@ -215,15 +495,10 @@ class BaseSpider(SpiderTools):
         if self.is_merge_default_headers:
             headers = self.default_headers | headers
 
-        same = dict(
-            headers=headers, params=params, proxies=proxies, timeout=timeout, **kwargs
-        )
-        response = (
-            self.client.get(url, **same)
-            if data is None and json is None
-            else self.client.post(url, data=data, json=json, **same)
-        )
-        return SelectorResponse(response)
+        response = self.request(url, headers, params, data, json, proxies, timeout, **kwargs)
+        if fp is not None:
+            self.dupefilter.add(fp)
+        return response
 
 
 class WauoSpider(BaseSpider):
@@ -254,9 +529,7 @@ class WauoSpider(BaseSpider):
         if self.is_merge_default_headers:
             headers = self.default_headers | headers
         proxies = proxies or self.get_proxies()
-        same = dict(headers=headers, params=params, proxies=proxies, timeout=timeout, **kwargs)
-        res = self.client.get(url, **same) if data is None and json is None else self.client.post(url, data=data, json=json, **same)
-        return SelectorResponse(res)
+        return self.request(url, headers, params, data, json, proxies, timeout, **kwargs)
 
     def go(
             self,
@@ -270,32 +543,53 @@ class WauoSpider(BaseSpider):
             retry_times=2,
             retry_delay=1,
             keep_headers=True,
+            dont_filter=False,
             **kwargs,
     ) -> SelectorResponse:
         """
         获取响应，自带重试
 
         Args:
-            retry_times: 请求出现异常时，进行重试的次数
-            retry_delay: 重试前先睡眠多少秒
+            retry_times: 请求出现异常时，进行重试的次数（设置了 retry_policy 时无效）
+            retry_delay: 重试前先睡眠多少秒（设置了 retry_policy 时无效）
             keep_headers: 请求时是否保持同一个headers
+            dont_filter: 不经过去重过滤器（设置了 dupefilter 时，请求成功过的请求会直接返回 None）
             **kwargs: 跟requests的参数保持一致
 
         Returns:
             SelectorResponse（可以使用Xpath、CSS）
         """
 
+        fp, seen = (None, False) if dont_filter else self.seen(url, params, data, json)
+        if seen:
+            logger.debug("重复的请求 => {}".format(url))
+            return None
+
         headers = headers or self.get_headers() if keep_headers else {}
         if headers and self.is_merge_default_headers:
             headers = self.default_headers | headers
 
+        if self.retry_policy is not None:
+            def call():
+                return self.request(url, headers or self.get_headers(), params, data, json, proxies or self.get_proxies(), timeout, **kwargs)
+
+            try:
+                response = self.retry_policy.run(call, url)
+            except Exception as e:
+                if self.is_raise_error:
+                    raise MaxRetryError(url) from e
+                return None
+            if fp is not None:
+                self.dupefilter.add(fp)
+            return response
+
         for i in range(retry_times + 1):
             headers = headers or self.get_headers()
-            proxies = proxies or self.get_proxies()
-            same = dict(headers=headers, params=params, proxies=proxies, timeout=timeout, **kwargs)
             try:
-                resp = self.client.get(url, **same) if data is None and json is None else self.client.post(url, data=data, json=json, **same)
-                return SelectorResponse(resp)
+                response = self.request(url, headers, params, data, json, proxies or self.get_proxies(), timeout, **kwargs)
+                if fp is not None:
+                    self.dupefilter.add(fp)
+                return response
             except Exception as e:
                 logger.error(
                     f"""
@@ -304,16 +598,284 @@ class WauoSpider(BaseSpider):
                     retry_times     {i}/{retry_times}
                     """
                 )
+                if isinstance(e, ResponseTooLargeError):
+                    break
                 time.sleep(retry_delay)
 
         if self.is_raise_error:
             raise MaxRetryError(url)
 
-    def download(self, url: str, save_path: str, is_text_type=False, encoding="UTF-8"):
-        """下载文件"""
-        resp = self.send(url)
-        content = resp.text if is_text_type else resp.content
-        self.save_file(save_path, content, encoding)
+    def fetch_many(self, reqs: Iterable[str | dict], concurrency=16, **kwargs) -> Iterator[tuple]:
+        """
+        批量请求，先完成的先返回
+        - reqs 的元素可以是 url，也可以是 go 的参数字典（必须包含 url），支持生成器
+        - 同时最多有 concurrency 个请求在进行，完成一个才从 reqs 中取下一个，内存占用与 reqs 的长度无关
+        - 设置了 limiter 时，拿到令牌的请求才会交给线程，被限速的请求暂存起来，不占用线程；
+          这只针对第一次请求，失败后的重试在线程中进行，retry_delay 和重新获取令牌的等待都会占用线程
+        - 设置了 dupefilter 时，重复的请求直接跳过（不会返回）；请求成功后才记为已请求，失败的请求下次还会请求，
+          同一批中与进行中的请求重复的也会跳过
+
+        Args:
+            concurrency: 并发数
+            **kwargs: 所有请求共用的 go 参数（会被请求字典中的同名参数覆盖）
+
+        Yields:
+            (请求, 响应) 或者 (请求, 异常)
+        """
+        reqs = iter(reqs)
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        running = {}
+        parked = []  # 被限速的请求 (可以请求的时间, 序号, 请求, 参数)
+        seq = itertools.count()
+        exhausted = False
+        in_flight = set()  # 已经提交、还没有结束的请求指纹
+
+        def check(params: dict) -> str | None | bool:
+            """返回请求指纹（不需要去重时为 None），重复时返回 False"""
+            if self.dupefilter is None or params.get("dont_filter"):
+                return None
+            fp = self.fingerprint(params["url"], params.get("params"), params.get("data"), params.get("json"))
+            if fp in in_flight or fp in self.dupefilter:
+                return False
+            params["dont_filter"] = True
+            in_flight.add(fp)
+            return fp
+
+        def wait_time(params: dict) -> float:
+            return self.limiter.try_acquire(self.limiter.key_of(params["url"])) if self.limiter else 0
+
+        def dispatch():
+            nonlocal exhausted
+            while len(running) < concurrency:
+                if parked and parked[0][0] <= time.time():
+                    _, _, req, params, fp = heapq.heappop(parked)
+                elif exhausted or len(parked) >= concurrency * 4:
+                    return
+                else:
+                    req = next(reqs, None)
+                    if req is None:
+                        exhausted = True
+                        return
+                    params = kwargs | ({"url": req} if isinstance(req, str) else req)
+                    fp = check(params)
+                    if fp is False:
+                        continue
+                delay = wait_time(params)
+                if delay:
+                    heapq.heappush(parked, (time.time() + delay, next(seq), req, params, fp))
+                else:
+                    running[pool.submit(self._go_prepaid, params)] = (req, fp)
+
+        try:
+            dispatch()
+            while running or parked:
+                timeout = max(0.0, parked[0][0] - time.time()) if parked else None
+                if running:
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(timeout)
+                    done = ()
+                for future in done:
+                    req, fp = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = e
+                    if fp is not None:
+                        in_flight.discard(fp)
+                        if result is not None and not isinstance(result, Exception):
+                            self.dupefilter.add(fp)
+                    dispatch()
+                    yield req, result
+                dispatch()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def crawl(self, frontier: Frontier, concurrency=16, **kwargs) -> Iterator[tuple]:
+        """
+        从待爬队列中取出请求并请求，先完成的先返回
+        - 请求成功（返回了响应）标记为完成，失败则交给 frontier 决定是否重新入队
+        - 迭代过程中可以继续往 frontier 中添加请求，队列为空且没有进行中的请求时结束
+        - 中途退出或者进程崩溃时，未完成的请求在下次打开 frontier 时会重新入队
+
+        Args:
+            concurrency: 并发数
+            **kwargs: 所有请求共用的 go 参数（会被请求字典中的同名参数覆盖）
+
+        Yields:
+            (请求, 响应) 或者 (请求, 异常)
+        """
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        running = {}
+        try:
+            while True:
+                while len(running) < concurrency:
+                    item = frontier.pop()
+                    if item is None:
+                        break
+                    fp, req = item
+                    params = kwargs | ({"url": req} if isinstance(req, str) else req)
+                    running[pool.submit(self.go, **params)] = (fp, req)
+                if not running:
+                    delay = frontier.next_ready_in()
+                    if delay is None:
+                        return
+                    time.sleep(delay)
+                    continue
+                done, _ = wait(running, timeout=frontier.next_ready_in(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    fp, req = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = e
+                    if result is None or isinstance(result, Exception):
+                        frontier.failed(fp)
+                    else:
+                        frontier.done(fp)
+                    yield req, result
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            frontier.checkpoint()
+
+    def _go_prepaid(self, params: dict) -> SelectorResponse:
+        """fetch_many 中已经获取过令牌的请求，第一次请求时不再限速"""
+        self.local.prepaid = self.limiter is not None
+        try:
+            return self.go(**params)
+        finally:
+            self.local.prepaid = False
+
+    def download(
+            self,
+            url: str,
+            save_path: str,
+            is_text_type=False,
+            encoding="UTF-8",
+            chunk_size=1024 * 64,
+            resume=False,
+            segments=1,
+            progress: Callable[[int, int, float], None] = None,
+            headers: dict = None,
+            proxies: dict = None,
+            timeout: int | float = None,
+    ) -> int:
+        """
+        下载文件（流式写入磁盘，内存占用只与 chunk_size 有关，不受 max_body_size 限制）
+
+        Args:
+            is_text_type: 是否按文本下载（以 encoding 编码保存）
+            chunk_size: 每次读取、写入的字节数
+            resume: 断点续传，文件已存在时通过 Range 请求只下载剩余部分（按文本下载时不支持）
+            segments: 分段数，大于1且服务器支持 Range 时，多线程并行下载各段；
+                先写入 save_path.part，各段进度保存在 save_path.part.json，全部成功后才重命名为 save_path，
+                resume 时只下载缺少的部分
+            progress: 进度回调，参数为 (已下载字节数, 总字节数, 速度 B/s)
+
+        Returns:
+            文件的字节数
+        """
+        headers = headers or self.get_headers()
+        if self.is_merge_default_headers:
+            headers = self.default_headers | headers
+        same = dict(proxies=proxies or self.get_proxies(), timeout=timeout or self.default_timeout)
+        self.throttle(url)
+
+        if is_text_type:
+            if resume:
+                logger.warning("按文本下载不支持断点续传，重新下载 => {}".format(url))
+            return self._download_text(url, save_path, encoding, chunk_size, progress, headers, **same)
+
+        if segments > 1:
+            head = self.client.head(url, headers=headers, allow_redirects=True, **same)
+            total = int(head.headers.get("Content-Length") or 0)
+            if head.headers.get("Accept-Ranges") == "bytes" and total > chunk_size * segments:
+                return self._download_segments(url, save_path, total, segments, chunk_size, progress, headers, resume, **same)
+            logger.warning("服务器不支持分段下载，改为单线程下载 => {}".format(url))
+
+        done = os.path.getsize(save_path) if resume and os.path.exists(save_path) else 0
+        if done:
+            headers = headers | {"Range": "bytes={}-".format(done)}
+
+        with self.client.get(url, headers=headers, stream=True, **same) as resp:
+            if resp.status_code == 416:
+                logger.info("文件已下载完成 => {}".format(save_path))
+                return done
+            if resp.status_code not in (200, 206):
+                raise ResponseCodeError("{} not in [200, 206]".format(resp.status_code))
+            if resp.status_code == 200:
+                done = 0
+            length = resp.headers.get("Content-Length")
+            bar = DownloadProgress(url, done + int(length) if length else None, done, progress)
+            prepare_file(save_path)
+            with open(save_path, "ab" if done else "wb") as f:
+                for chunk in resp.iter_content(chunk_size):
+                    f.write(chunk)
+                    bar.update(len(chunk))
+        bar.finish()
+        return bar.done
+
+    def _download_text(self, url, save_path, encoding, chunk_size, progress, headers, **kwargs) -> int:
+        """按文本下载，边解码边写入"""
+        with self.client.get(url, headers=headers, stream=True, **kwargs) as resp:
+            if resp.status_code != 200:
+                raise ResponseCodeError("{} not in [200]".format(resp.status_code))
+            resp.encoding = resp.encoding or "UTF-8"
+            length = resp.headers.get("Content-Length")
+            bar = DownloadProgress(url, int(length) if length else None, 0, progress)
+            prepare_file(save_path)
+            with open(save_path, "w", encoding=encoding) as f:
+                for text in resp.iter_content(chunk_size, decode_unicode=True):
+                    f.write(text)
+                    bar.update(len(text))
+        bar.finish()
+        return os.path.getsize(save_path)
+
+    def _download_segments(self, url, save_path, total, segments, chunk_size, progress, headers, resume, **kwargs) -> int:
+        """分段并行下载，每段各自写入 .part 文件的对应位置，全部成功后重命名"""
+        part = save_path + ".part"
+        state_path = part + ".json"
+        ranges = load_segments(state_path, total) if resume and os.path.exists(part) else None
+        if ranges is None:
+            if resume and not os.path.exists(part) and os.path.exists(save_path) and os.path.getsize(save_path) == total:
+                logger.info("文件已下载完成 => {}".format(save_path))
+                return total
+            ranges = [[start, end, 0] for start, end in split_ranges(total, segments)]
+            if os.path.exists(part):
+                os.remove(part)
+        prepare_file(part, total)
+        save_segments(state_path, total, ranges)
+        bar = DownloadProgress(url, total, sum(r[2] for r in ranges), progress)
+
+        def fetch(r: list[int]):
+            start, end, written = r
+            if start + written > end:
+                return
+            part_headers = headers | {"Range": "bytes={}-{}".format(start + written, end)}
+            with self.client.get(url, headers=part_headers, stream=True, **kwargs) as resp:
+                if resp.status_code != 206:
+                    raise ResponseCodeError("{} not in [206]".format(resp.status_code))
+                with open(part, "r+b") as f:
+                    f.seek(start + written)
+                    for chunk in resp.iter_content(chunk_size):
+                        chunk = chunk[:end + 1 - start - r[2]]
+                        f.write(chunk)
+                        r[2] += len(chunk)
+                        bar.update(len(chunk))
+            if start + r[2] <= end:
+                raise ResponseCodeError("分段 {}-{} 不完整".format(start, end))
+
+        try:
+            with ThreadPoolExecutor(max_workers=segments) as pool:
+                fs = [pool.submit(fetch, r) for r in ranges]
+                for f in fs:
+                    f.result()
+        finally:
+            save_segments(state_path, total, ranges)  # 失败时保留进度，resume 时只下载缺少的部分
+        os.replace(part, save_path)
+        os.remove(state_path)
+        bar.finish()
+        return total
 
     def get_local_ip(self) -> str:
         """获取本地IP"""
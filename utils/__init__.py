@@ -1,4 +1,39 @@
-from wauo.utils.decors import *
-from wauo.utils.funcs import *
-from wauo.utils.loger import *
-from wauo.utils.pools import *
+from typing import TYPE_CHECKING
+
+from wauo._lazy import lazy_module
+
+if TYPE_CHECKING:
+    from wauo.utils.decors import forever, monitor, retry, safe, timer, type_check
+    from wauo.utils.funcs import cprint, get_results, kill_thread, make_ua, nget, now, pv, time2ts, timef, today_anytime_ts, ts2time
+    from wauo.utils.loger import Loger
+    from wauo.utils.pools import BasePool, PoolMan, PoolWait
+    from wauo.utils.stats import Histogram
+
+# 首次访问时才导入对应的模块
+_modules = {
+    "wauo.utils.decors": ["monitor", "type_check", "forever", "safe", "retry", "timer"],
+    "wauo.utils.funcs": [
+        "pv", "ts2time", "time2ts", "today_anytime_ts", "timef", "nget", "kill_thread", "get_results", "now", "cprint", "make_ua"
+    ],
+    "wauo.utils.loger": ["Loger", "logger"],
+    "wauo.utils.pools": ["BasePool", "PoolWait", "PoolMan"],
+    "wauo.utils.stats": ["Histogram"],
+}
+_exports = {name: module for module, names in _modules.items() for name in names}
+
+__all__ = list(_exports)
+
+# 以前 from wauo.utils.xxx import * 顺带导出的标准库名称和子模块，保留以兼容旧代码（不在 __all__ 中）
+_compat = {
+    "abc": ["ABC", "abstractmethod"],
+    "concurrent.futures": ["Future", "ThreadPoolExecutor", "as_completed"],
+    "datetime": ["datetime", "timedelta"],
+    "functools": ["partial", "wraps"],
+    "threading": ["Thread"],
+    "typing": ["Callable"],
+}
+_exports.update({name: module for module, names in _compat.items() for name in names})
+_submodules = {name: name for name in ("ctypes", "inspect", "random", "sys", "threading", "time")}
+_submodules.update({name: "wauo.utils." + name for name in ("decors", "funcs", "loger", "pools")})
+
+__getattr__, __dir__ = lazy_module(__name__, _exports, _submodules)
@@ -1,100 +1,195 @@
-import threading
-from abc import ABC, abstractmethod
-from concurrent.futures import ThreadPoolExecutor, Future, wait as _wait
-from functools import partial
-from typing import Callable
-
-from loguru import logger
-
-
-class BasePool(ABC):
-    """线程池基类"""
-
-    def __init__(self, speed=10, limit: int = None):
-        self.speed = speed
-        self.pool = ThreadPoolExecutor(max_workers=self.speed)
-        self.count = 0
-        self.max_count = limit or speed
-        self.running_futures = []
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
-
-    def close(self, wait=True, cancel_futures=False):
-        """释放资源"""
-        self.pool.shutdown(wait=wait, cancel_futures=cancel_futures)
-
-    def done(self, func_name: str, future: Future):
-        """线程的回调函数"""
-        try:
-            future.result()
-        except Exception as e:
-            logger.error("{} => {}".format(func_name, e))
-
-    @abstractmethod
-    def add(self, func: Callable, *args, **kwargs):
-        pass
-
-    def adds(self, func, *some):
-        for args in zip(*some):
-            self.add(func, *args)
-
-    def record(self, func: Callable, *args, **kwargs):
-        future = self.pool.submit(func, *args, **kwargs)
-        self.count += 1
-        self.running_futures.append(future)
-        return future
-
-    def block(self):
-        """阻塞，等待所有任务完成"""
-        _wait(self.running_futures)
-
-    def is_running(self):
-        """是否还有任务在运行"""
-        for f in self.running_futures:
-            if f.running():
-                return True
-        return False
-
-
-class PoolWait(BasePool):
-    """需要等待同一批的线程全部结束后，才能分配下一批新线程"""
-
-    def add(self, func: Callable, *args, **kwargs):
-        """核心"""
-        if self.count >= self.max_count:
-            _wait(self.running_futures)
-            self.running_futures.clear()
-            self.count = 0
-        future = self.record(func, *args, **kwargs)
-        future.add_done_callback(partial(self.done, func.__name__))
-
-
-class PoolMan(BasePool):
-    """当池子里有任意线程结束时，可以立刻分配新的线程"""
-
-    def __init__(self, speed=10, limit: int = None):
-        super().__init__(speed, limit)
-        self.add_task = threading.Condition()
-        self.running_futures = []
-
-    def add(self, func, *args, **kwargs):
-        """核心"""
-        with self.add_task:
-            while self.count >= self.max_count:
-                # logger.info('wait......{}'.format(args))
-                self.add_task.wait()
-            future = self.record(func, *args, **kwargs)
-            future.add_done_callback(partial(self.done, func.__name__))
-
-    def done(self, func_name: str, future: Future):
-        """线程的回调函数"""
-        super().done(func_name, future)
-
-        with self.add_task:
-            self.count -= 1
-            self.running_futures.remove(future)
-            self.add_task.notify()
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, Future
+from functools import partial
+from typing import Callable
+
+from loguru import logger
+
+from wauo.pool.adaptive import AdaptiveLimit
+from wauo.utils.stats import Histogram
+
+# 任务耗时分桶（秒），比请求耗时的分桶多了毫秒级
+TASK_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
+
+class _Task:
+    __slots__ = ("submitted", "started", "ok")
+
+    def __init__(self):
+        self.submitted = time.perf_counter()
+        self.started = 0.0  # 没有开始执行时为 0
+        self.ok = False
+
+
+class BasePool(ABC):
+    """
+    线程池基类
+    - 未完成的任务保存在字典中，提交、完成都是 O(1)
+    - stats 返回实时统计（由计数器得到，与任务数无关）：排队数、执行数、完成数、失败数、吞吐量、等待耗时与执行耗时的分位数，用于调整 speed / limit
+    """
+
+    def __init__(self, speed=10, limit: int = None):
+        self.speed = speed
+        self.pool = ThreadPoolExecutor(max_workers=self.speed)
+        self.count = 0
+        self.max_count = limit or speed
+        self.running_futures: dict[Future, _Task] = {}  # 未完成的任务
+
+        self.cond = threading.Condition()
+        self.start_lock = threading.Lock()  # 只用于开始执行的计数，不与提交、完成争抢 cond
+        self.started = 0  # 累计开始执行的任务数，减去 completed + failed 即为正在执行的任务数
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.started_at = time.time()
+        self.wait_time = Histogram(TASK_BUCKETS)  # 从提交到开始执行
+        self.latency = Histogram(TASK_BUCKETS)  # 执行耗时
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self, wait=True, cancel_futures=False):
+        """释放资源"""
+        self.pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def done(self, func_name: str, future: Future):
+        """线程的回调函数"""
+        try:
+            future.result()
+        except Exception as e:
+            logger.error("{} => {}".format(func_name, e))
+
+    @abstractmethod
+    def add(self, func: Callable, *args, **kwargs):
+        pass
+
+    def adds(self, func, *some):
+        for args in zip(*some):
+            self.add(func, *args)
+
+    def _task(self, task: _Task, func: Callable, *args, **kwargs):
+        """包装任务，记录开始执行的时间和是否成功"""
+        task.started = time.perf_counter()
+        with self.start_lock:
+            self.started += 1
+        result = func(*args, **kwargs)
+        task.ok = True
+        return result
+
+    def _finish(self, task: _Task, func_name: str, future: Future):
+        """任务结束（完成、失败或者取消）时的统计，然后调用 done"""
+        now = time.perf_counter()
+        with self.cond:
+            del self.running_futures[future]
+            if not task.started:
+                self.cancelled += 1
+            else:
+                self.wait_time.observe(task.started - task.submitted)
+                self.latency.observe(now - task.started)
+                if task.ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._release(task, now)
+            if not self.running_futures:
+                self.cond.notify_all()  # 唤醒 block
+        self.done(func_name, future)
+
+    def _release(self, task: _Task, now: float):
+        """任务结束时在锁内调用（与统计共用一次加锁）"""
+
+    def record(self, func: Callable, *args, **kwargs):
+        """提交任务，任务结束时会调用 done"""
+        task = _Task()
+        with self.cond:
+            future = self.pool.submit(self._task, task, func, *args, **kwargs)
+            self.count += 1
+            self.running_futures[future] = task
+        future.add_done_callback(partial(self._finish, task, func.__name__))
+        return future
+
+    def block(self):
+        """阻塞，等待所有任务完成"""
+        with self.cond:
+            self.cond.wait_for(lambda: not self.running_futures)
+
+    def is_running(self):
+        """是否还有未完成的任务（包括还在排队的）"""
+        return bool(self.running_futures)
+
+    def stats(self) -> dict:
+        """实时统计，耗时单位为毫秒（分位数按分桶估算，为所在分桶的上界）"""
+        with self.cond:
+            cost = max(time.time() - self.started_at, 1e-9)
+            finished = self.completed + self.failed
+            running = self.started - finished
+            return {
+                "queued": len(self.running_futures) - running,
+                "running": running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "tasks_per_sec": round(finished / cost, 2),
+                "wait_ms": {q: round(self.wait_time.quantile(v) * 1000, 2) for q, v in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+                "latency_ms": {q: round(self.latency.quantile(v) * 1000, 2) for q, v in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+                "avg_latency_ms": round(self.latency.sum / self.latency.count * 1000, 2) if self.latency.count else 0.0,
+            }
+
+
+class PoolWait(BasePool):
+    """需要等待同一批的线程全部结束后，才能分配下一批新线程"""
+
+    def add(self, func: Callable, *args, **kwargs):
+        """核心"""
+        if self.count >= self.max_count:
+            self.block()
+            self.count = 0
+        self.record(func, *args, **kwargs)
+
+
+class PoolMan(BasePool):
+    """
+    当池子里有任意线程结束时，可以立刻分配新的线程
+    - adaptive 模式下最多同时存在的任务数（max_count）根据任务耗时（从提交到结束）和失败率自动调整，见 AdaptiveLimit
+
+    Args:
+        speed: 线程数
+        limit: 最多同时存在的任务数（包括排队的），默认为 speed
+        adaptive: True 时在 [1, limit] 之间自动调整，也可以传入 AdaptiveLimit 自定义参数（线程数不少于它的 max_limit）
+    """
+
+    def __init__(self, speed=10, limit: int = None, adaptive: bool | AdaptiveLimit = False):
+        if adaptive is True:
+            adaptive = AdaptiveLimit(max_limit=limit or speed)
+        self.adaptive: AdaptiveLimit | None = adaptive or None
+        if self.adaptive is not None:
+            speed = max(speed, self.adaptive.max_limit)
+            limit = self.adaptive.limit
+        super().__init__(speed, limit)
+        self.add_task = self.cond
+
+    def add(self, func, *args, **kwargs):
+        """核心"""
+        with self.add_task:
+            while self.count >= self.max_count:
+                # logger.info('wait......{}'.format(args))
+                self.add_task.wait()
+            self.record(func, *args, **kwargs)
+
+    def _release(self, task: _Task, now: float):
+        in_flight = self.count
+        self.count -= 1
+        if self.adaptive is None or not task.started:
+            self.add_task.notify()
+            return
+        limit = self.adaptive.record(now - task.submitted, task.ok, in_flight)
+        if limit > self.max_count:
+            self.add_task.notify_all()
+        else:
+            self.add_task.notify()
+        self.max_count = limit